@@ -1,5 +1,6 @@
 import os
 import sys
+from contextlib import contextmanager
 
 from src.exception import CustomException
 from src.logger import logging
@@ -7,6 +8,23 @@ from backend.app.utils.supabase_client import client
 from fastapi import Cookie, Header, HTTPException
 from fastapi import Request
 from src.utils import generateImage
+from backend.app.services.admission_service import AdmissionRejected
+from backend.app.services.recommendation_cache_service import session_key
+from backend.app.services.llm_provider_service import LLMUnavailable, LLMDeadlineExceeded
+
+@contextmanager
+def admitted(request, token):
+    """Hold an LLM concurrency slot for this user or fail fast with a 429"""
+    try:
+        with request.app.state.admission.admit(session_key(token)):
+            yield
+    except AdmissionRejected as e:
+        logging.warning(f"Admission rejected: {e.reason}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many recommendation requests right now. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
 def generateRecommendations(payload, request):
     try:
@@ -16,24 +34,103 @@ def generateRecommendations(payload, request):
         retrieval_chain = request.app.state.retrieval_chain
         logging.info(f"Generating recommendations for query: {payload.query}")
         
-        response = retrieval_chain.invoke(payload.query)
+        cached = request.app.state.response_cache.lookup(payload.query)
+        if cached is not None:
+            logging.info("Serving precomputed recommendations")
+            request.app.state.candidate_cache.store(
+                token=token,
+                query=payload.query,
+                message=cached["message"],
+                recommendations=cached["recommendations"],
+                candidates=cached["candidates"]
+            )
+            return {
+                "message": cached["message"],
+                "recommendations": cached["recommendations"],
+            }
         
-        logging.info(f"LLM Response: {response}")
-        print(f"LLM response: {response}")
+        try:
+            with admitted(request, token):
+                result = retrieval_chain.invoke(payload.query)
+        except LLMDeadlineExceeded:
+            raise HTTPException(status_code=504, detail="Recommendations took too long. Please try again.")
+        except LLMUnavailable:
+            raise HTTPException(status_code=503, detail="Recommendations are temporarily unavailable. Please try again shortly.")
+        response = result["response"]
+        
+        logging.info("LLM response", extra={"payload": response})
+        
+        recommendations = [
+            {
+                "title": rec.title,
+                "genre": rec.genre,
+                "url": rec.url,
+                "reason": rec.reason
+            }
+            for rec in response.recommendations
+        ]
+        request.app.state.candidate_cache.store(
+            token=token,
+            query=payload.query,
+            message=response.message,
+            recommendations=recommendations,
+            candidates=request.app.state.catalog.candidates(result["context"])
+        )
         
         return {
             "message": response.message,
-            "recommendations": [
-                {
-                    "title": rec.title,
-                    "genre": rec.genre,
-                    "url": rec.url,
-                    "reason": rec.reason
-                }
-                for rec in response.recommendations
-            ],
+            "recommendations": recommendations,
         }
             
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def generateMoreRecommendations(payload, request):
+    try:
+        token = request.cookies.get("access_token")
+        if token is None:
+            return {"message": "User not authenticated"}
+        candidate_cache = request.app.state.candidate_cache
+        pool = candidate_cache.load(token)
+        if pool is None:
+            raise HTTPException(status_code=404, detail="No recommendations to continue. Please search again.")
+        
+        cached = candidate_cache.cached_page(pool, payload.page, payload.page_size)
+        if cached is not None:
+            return {"message": pool["message"], "recommendations": cached}
+        
+        start = (payload.page - 2) * payload.page_size
+        candidates = pool["candidates"][start:start + payload.page_size]
+        if not candidates:
+            return {"message": "No more recommendations for this search.", "recommendations": []}
+        
+        logging.info(f"Explaining page {payload.page} ({len(candidates)} candidates) for query: {pool['query']}")
+        with admitted(request, token):
+            explanations = request.app.state.page_chain.invoke({
+                "input": pool["query"],
+                "candidates": "\n".join(
+                    f"- {candidate['title']} | Genre: {candidate['genre']} | Theme: {candidate['theme']}"
+                    for candidate in candidates
+                )
+            })
+        reasons = {item.title.strip().lower(): item.reason for item in explanations.reasons}
+        
+        recommendations = [
+            {
+                "title": candidate["title"],
+                "genre": candidate["genre"],
+                "url": candidate["url"],
+                "reason": reasons.get(candidate["title"].lower(), "")
+            }
+            for candidate in candidates
+        ]
+        candidate_cache.store_page(pool, payload.page, payload.page_size, recommendations)
+        return {"message": pool["message"], "recommendations": recommendations}
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise CustomException(e, sys)
     
@@ -50,13 +147,7 @@ def getAnime(payload, request):
         if not token:
             raise HTTPException(status_code=401, detail="Not authenticated")
         user_response = client.auth.get_user(jwt=token)
-        result = (
-            client.tables("animes")
-            .insert({"anime_name": payload.title, "anime_genre": payload.genre})
-            .execute()
-        )
-        if result.error:
-            raise Exception(result.error.message)
+        # postgrest raises APIError on a failed request, so results need no error checks
         result = (
             client.table("users")
             .select("user_id")
@@ -70,14 +161,20 @@ def getAnime(payload, request):
             .eq("anime_name", payload.title)
             .execute()
         )
+        if not result.data:
+            result = (
+                client.table("animes")
+                .insert({"anime_name": payload.title, "anime_genre": payload.genre})
+                .execute()
+            )
         anime_id = result.data[0]['anime_id']
-        result = (
+        (
             client.table("useranimeinteractions")
             .insert({"user_id": user_id, "anime_id": anime_id, "interaction_type": "view"})
             .execute()
         )
-        if result.error:
-            raise Exception(result.error.message)
+        entry = request.app.state.catalog.lookup(payload.title) or {}
+        request.app.state.history_cache.record_view(user_id, entry.get("genres", []))
         return {"message": "Anime viewed successfully"}
     except Exception as e:
         raise CustomException(e, sys)
\ No newline at end of file
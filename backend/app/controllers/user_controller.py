@@ -70,11 +70,13 @@ def login_user(payload):
     except Exception as e:
         raise CustomException(e, sys)
 
-def logout():
+def logout(request):
     try:
-        result = client.auth.sign_out()
-        if result.error:
-            raise Exception(result.error.message)
+        token = request.cookies.get("access_token")
+        if token:
+            # A cached identity would otherwise keep serving this session's history
+            request.app.state.history_cache.forget(token)
+        client.auth.sign_out()
         return {"message": "User logged out successfully"}
     except Exception as e:
         raise CustomException(e, sys)
@@ -108,6 +110,8 @@ def delete_user(request):
         
         # Delete from custom users table
         result = client.table("users").delete().eq("email", email).execute()
+        deleted_user_id = result.data[0]['user_id'] if result.data else None
+        request.app.state.history_cache.forget(token, deleted_user_id)
         
         # Delete from Supabase Auth
         # Note: This requires admin privileges
@@ -117,4 +121,77 @@ def delete_user(request):
         return {"message": "User deleted successfully"}
         
     except Exception as e:
-        raise CustomException(e, sys)
\ No newline at end of file
+        raise CustomException(e, sys)
+
+
+def getHistory(request, cursor=None, limit=20):
+    """Keyset-paginated watch history with posters and genres hydrated from the local catalog"""
+    try:
+        token = request.cookies.get("access_token")
+        if token is None:
+            return {"message": "User not authenticated"}
+        history_cache = request.app.state.history_cache
+        catalog = request.app.state.catalog
+        
+        user_id = history_cache.user_id(token)
+        if user_id is None:
+            user_response = client.auth.get_user(jwt=token)
+            result = client.table("users").select("user_id").eq("email", user_response.user.email).execute()
+            if not result.data:
+                return {"message": "User not signed up"}
+            user_id = result.data[0]['user_id']
+            history_cache.remember_user(token, user_id)
+        
+        history = history_cache.history(user_id)
+        generation = history["generation"]
+        page = history["pages"].get((cursor, limit))
+        genre_counts = history["genre_counts"]
+        need_counts = genre_counts is None
+        if page is None or need_counts:
+            # One RPC returns the page and, on a cold cache, per-anime view
+            # counts aggregated in Postgres (see backend/sql/user_history.sql)
+            result = client.rpc("user_history", {
+                "p_user_id": user_id,
+                "p_cursor": cursor,
+                "p_limit": limit,
+                "p_with_counts": need_counts
+            }).execute()
+            rows = result.data["rows"]
+
+            if page is None:
+                items = []
+                for row in rows[:limit]:
+                    title = row.get("anime_name") or ""
+                    entry = catalog.lookup(title) or {}
+                    items.append({
+                        "interaction_id": row["interaction_id"],
+                        "interaction_type": row["interaction_type"],
+                        "title": title,
+                        "genre": ", ".join(entry.get("genres", [])),
+                        "image": entry.get("url"),
+                        "tags": entry.get("themes", [])
+                    })
+                # The extra row tells us whether there is a next page
+                page = {
+                    "items": items,
+                    "next_cursor": rows[limit - 1]["interaction_id"] if len(rows) > limit else None
+                }
+                history_cache.store_page(user_id, generation, (cursor, limit), page)
+
+            if need_counts:
+                counts = {}
+                for title, views in result.data["anime_counts"].items():
+                    entry = catalog.lookup(title) or {}
+                    for genre in entry.get("genres", []):
+                        counts[genre] = counts.get(genre, 0) + views
+                genre_counts = history_cache.set_genre_counts(user_id, generation, counts)
+
+        return {
+            "message": "History fetched successfully",
+            "items": page["items"],
+            "next_cursor": page["next_cursor"],
+            "genre_counts": genre_counts
+        }
+        
+    except Exception as e:
+        raise CustomException(e, sys)
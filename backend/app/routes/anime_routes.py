@@ -5,8 +5,8 @@ from fastapi import APIRouter, Cookie, HTTPException, Header
 from fastapi import Request
 from src.exception import CustomException
 from src.logger import logging
-from pydantic import BaseModel
-from backend.app.controllers.anime_controller import generateRecommendations, getAnime
+from pydantic import BaseModel, Field
+from backend.app.controllers.anime_controller import generateRecommendations, generateMoreRecommendations, getAnime
 from fastapi.responses import JSONResponse
 
 anime_router = APIRouter()
@@ -15,6 +15,11 @@ class RecommendAnimes(BaseModel):
     query: str
     
 
+class RecommendMoreAnimes(BaseModel):
+    page: int = Field(default=2, ge=2)
+    page_size: int = Field(default=5, ge=1, le=20)
+
+
 class GetAnime(BaseModel):
     title: str
     genre: str
@@ -24,8 +29,19 @@ class GetAnime(BaseModel):
 def get_recommendations_route(payload: RecommendAnimes, request: Request):
     try:
         result = generateRecommendations(payload=payload, request=request)
-        print(f"Result: {result}")
         return JSONResponse(content=result['recommendations'])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise CustomException(e, sys)
+
+@anime_router.post("/recommendation/more")
+def get_more_recommendations_route(payload: RecommendMoreAnimes, request: Request):
+    try:
+        result = generateMoreRecommendations(payload=payload, request=request)
+        return JSONResponse(content=result.get('recommendations', result))
+    except HTTPException:
+        raise
     except Exception as e:
         raise CustomException(e, sys)
 
@@ -3,11 +3,12 @@ import sys
 import requests
 
 from pydantic import BaseModel
-from fastapi import APIRouter, Request
+from typing import Optional
+from fastapi import APIRouter, Query, Request
 from src.exception import CustomException
 from src.logger import logging
 from backend.app.utils.supabase_client import client
-from backend.app.controllers.user_controller import signup_user, login_user, logout, homePage, delete_user
+from backend.app.controllers.user_controller import signup_user, login_user, logout, homePage, delete_user, getHistory
 from fastapi.responses import JSONResponse
 
 user_router = APIRouter()
@@ -67,9 +68,9 @@ def login(payload: LoginRequest):
 
 
 @user_router.post("/logout")
-def logout_route():  # ← Renamed to avoid conflict
+def logout_route(request: Request):  # ← Renamed to avoid conflict
     try:
-        result = logout()  # ← Now calls controller function
+        result = logout(request=request)  # ← Now calls controller function
         response = JSONResponse(content={"message": result['message']})
         # Clear the token cookie (not access_token!)
         response.delete_cookie(key="access_token")  # ← Fixed: "token" not "access_token"
@@ -85,6 +86,15 @@ def home(request:Request):
     except Exception as e:
         raise CustomException(e, sys)
 
+@user_router.get("/history")
+def history(request: Request, cursor: Optional[int] = None, limit: int = Query(default=20, ge=1, le=50)):
+    """Watch history, newest first; pass the returned next_cursor to get the following page"""
+    try:
+        result = getHistory(request=request, cursor=cursor, limit=limit)
+        return JSONResponse(content=result)
+    except Exception as e:
+        raise CustomException(e, sys)
+
 @user_router.delete("/delete")
 def delete(request: Request):
     """Delete user account from both users table and Supabase Auth"""
@@ -5,8 +5,13 @@ from pydantic import BaseModel, Field
 
 from dotenv import load_dotenv
 from src.exception import CustomException
+from src.utils import formatContext
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+from langchain_core.retrievers import BaseRetriever
+from backend.app.services.llm_provider_service import build_provider, build_hedged_llm
 
 load_dotenv()  
 
@@ -22,16 +27,53 @@ class RecommendationResponse(BaseModel):
     message: str = Field(description="A brief, friendly message about the recommendations (1-2 sentences)")
     recommendations: List[AnimeRecommendation] = Field(description="List of 5-10 anime recommendations")
 
-def load_retrieval_chain(db):
+class CandidateReason(BaseModel):
+    """Reason for a single follow-up page candidate"""
+    title: str = Field(description="Exact candidate title as given in the list")
+    reason: str = Field(description="Brief reason why this anime matches the user's query (1 sentence)")
+
+class PageExplanations(BaseModel):
+    """Explanations for a follow-up page of candidates"""
+    reasons: List[CandidateReason] = Field(description="One reason per candidate, in the same order")
+
+def load_recommendation_llm():
+    """Primary Gemini model, hedged by Groq when GROQ_API_KEY is configured"""
     try:
-        base_llm = ChatGoogleGenerativeAI(
-            api_key=os.getenv("GOOGLE_API_KEY"),
-            model='gemini-2.5-flash',
-            temperature=0.3,  # Lower temperature for consistent structured output
-            max_retries=3
-        )
+        providers = [
+            build_provider(
+                "gemini",
+                ChatGoogleGenerativeAI(
+                    api_key=os.getenv("GOOGLE_API_KEY"),
+                    model=os.getenv("PRIMARY_LLM_MODEL", "gemini-2.5-flash"),
+                    temperature=0.3,  # Lower temperature for consistent structured output
+                    # Provider-side retries multiply load while we are being throttled;
+                    # admission control sheds the excess instead.
+                    max_retries=int(os.getenv("LLM_MAX_RETRIES", "1"))
+                ).with_structured_output(RecommendationResponse)
+            )
+        ]
+        if os.getenv("GROQ_API_KEY"):
+            providers.append(
+                build_provider(
+                    "groq",
+                    ChatGroq(
+                        api_key=os.getenv("GROQ_API_KEY"),
+                        model=os.getenv("SECONDARY_LLM_MODEL", "llama-3.3-70b-versatile"),
+                        temperature=0.3,
+                        max_retries=int(os.getenv("LLM_MAX_RETRIES", "1"))
+                    ).with_structured_output(RecommendationResponse)
+                )
+            )
         
-        llm = base_llm.with_structured_output(RecommendationResponse)
+        hedged_llm = build_hedged_llm(providers, RecommendationResponse)
+        return RunnableLambda(hedged_llm.invoke, afunc=hedged_llm.ainvoke, name="HedgedLLM")
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def load_retrieval_chain(db, llm=None):
+    """`db` is a vector store, or any retriever (e.g. ShardedRetriever) to use as-is"""
+    try:
+        llm = llm or load_recommendation_llm()
         
         system_prompt = '''You are an expert AI assistant specialized in recommending anime to users.
             You have access to a comprehensive anime database with titles, genres, themes, episodes, and ratings.
@@ -89,21 +131,44 @@ def load_retrieval_chain(db):
             ("human", human_message)
         ])
         
-        retriever = db.as_retriever(search_kwargs={"k": 50})
+        retriever = db if isinstance(db, BaseRetriever) else db.as_retriever(search_kwargs={"k": 50})
         
-        from langchain_core.runnables import RunnablePassthrough
-        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.runnables import RunnableParallel, RunnablePassthrough
         
-        retrieval_chain = (
-            {
-                "context": retriever,
-                "input": RunnablePassthrough()
-            }
+        # Keep the retrieved documents next to the LLM response so the ranked
+        # candidates the LLM did not pick can be served as follow-up pages.
+        retrieval_chain = RunnableParallel(
+            context=retriever,
+            input=RunnablePassthrough()
+        ).assign(
+            response=RunnableLambda(lambda x: {"context": formatContext(x["context"]), "input": x["input"]})
             | prompt
             | llm
         )
         
         return retrieval_chain
         
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def load_page_chain():
+    """Small, cheap chain that only explains an already-ranked page of candidates"""
+    try:
+        base_llm = ChatGoogleGenerativeAI(
+            api_key=os.getenv("GOOGLE_API_KEY"),
+            model=os.getenv("PAGE_LLM_MODEL", "gemini-2.5-flash-lite"),
+            temperature=0.3,
+            max_retries=1
+        )
+        
+        llm = base_llm.with_structured_output(PageExplanations)
+        
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "You explain anime recommendations. For every candidate, write one short sentence on why it matches the user's query. Use only the given candidates, keep their exact titles and order."),
+            ("human", "User query: {input}\n\nCandidates:\n{candidates}")
+        ])
+        
+        return prompt | llm
+        
     except Exception as e:
         raise CustomException(e, sys)
\ No newline at end of file
@@ -0,0 +1,151 @@
+import os
+import math
+import time
+import threading
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+
+from backend.app.utils.metrics import metrics
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted in time, carries a Retry-After hint"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Request rejected by admission control: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("user", "granted")
+
+    def __init__(self, user):
+        self.user = user
+        self.granted = False
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded wait queue and per-user fairness.
+
+    At most `max_concurrency` requests run at once. Further requests wait in a
+    queue of at most `max_queue` entries for up to `max_wait_seconds`. Freed
+    slots go round-robin over the users with queued requests, each user's
+    requests in arrival order, so one user's backlog cannot hold back a user
+    who queued later. A single user can hold at most `max_per_user` running or
+    queued requests.
+    """
+
+    def __init__(self, name, max_concurrency, max_queue, max_wait_seconds, max_per_user):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.max_per_user = max_per_user
+        self._cond = threading.Condition()
+        self._active = 0
+        self._active_by_user = Counter()
+        # user -> that user's waiters, oldest first; the first user is served next
+        self._waiters = OrderedDict()
+        self._queued = 0
+        # Moving average of how long an admitted request holds its slot,
+        # used to estimate Retry-After.
+        self._service_seconds = 5.0
+
+    def _reject(self, reason):
+        metrics.inc(f"{self.name}.rejected.{reason}")
+        backlog = self._queued + 1
+        retry_after = max(1, math.ceil(self._service_seconds * backlog / self.max_concurrency))
+        raise AdmissionRejected(reason, retry_after)
+
+    def _publish(self):
+        metrics.set_gauge(f"{self.name}.active", self._active)
+        metrics.set_gauge(f"{self.name}.queue_depth", self._queued)
+
+    def _grant(self, user):
+        self._active += 1
+        self._active_by_user[user] += 1
+
+    def _enqueue(self, waiter):
+        self._waiters.setdefault(waiter.user, deque()).append(waiter)
+        self._queued += 1
+
+    def _dequeue(self, waiter):
+        queue = self._waiters[waiter.user]
+        queue.remove(waiter)
+        if not queue:
+            del self._waiters[waiter.user]
+        self._queued -= 1
+
+    def _grant_waiters(self):
+        while self._active < self.max_concurrency and self._waiters:
+            # The user at the front gets one slot, then moves to the back if it still has waiters
+            user, queue = next(iter(self._waiters.items()))
+            waiter = queue[0]
+            self._dequeue(waiter)
+            if user in self._waiters:
+                self._waiters.move_to_end(user)
+            waiter.granted = True
+            self._grant(user)
+        self._cond.notify_all()
+
+    def acquire(self, user):
+        with self._cond:
+            queued = len(self._waiters.get(user, ()))
+            if self._active_by_user[user] + queued >= self.max_per_user:
+                self._reject("user_limit")
+
+            if self._active < self.max_concurrency and not self._waiters:
+                self._grant(user)
+                metrics.inc(f"{self.name}.admitted")
+                self._publish()
+                return
+
+            if self._queued >= self.max_queue:
+                self._reject("queue_full")
+
+            waiter = _Waiter(user)
+            self._enqueue(waiter)
+            self._publish()
+            started = time.monotonic()
+            deadline = started + self.max_wait_seconds
+            while not waiter.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._dequeue(waiter)
+                    self._publish()
+                    self._reject("queue_timeout")
+                self._cond.wait(remaining)
+
+            metrics.inc(f"{self.name}.admitted")
+            metrics.observe(f"{self.name}.queue_wait_seconds", time.monotonic() - started)
+            self._publish()
+
+    def release(self, user, held_seconds):
+        with self._cond:
+            self._active -= 1
+            self._active_by_user[user] -= 1
+            if self._active_by_user[user] <= 0:
+                del self._active_by_user[user]
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * held_seconds
+            self._grant_waiters()
+            self._publish()
+
+    @contextmanager
+    def admit(self, user):
+        self.acquire(user)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(user, time.monotonic() - started)
+
+
+def load_admission_controller():
+    return AdmissionController(
+        name="admission.llm",
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        max_queue=int(os.getenv("LLM_MAX_QUEUE", "16")),
+        max_wait_seconds=float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "10")),
+        max_per_user=int(os.getenv("LLM_MAX_PER_USER", "2")),
+    )
@@ -0,0 +1,66 @@
+import os
+import sys
+import csv
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import parseList, documentId
+
+
+class AnimeCatalog:
+    """In-memory view of artifacts/data.csv for hydrating posters and genres by title or MAL Id"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._by_id = {str(entry["id"]): entry for entry in entries}
+        self._by_title = {}
+        for entry in entries:
+            for title in entry["titles"]:
+                self._by_title.setdefault(title.strip().lower(), entry)
+
+    @classmethod
+    def load(cls, data_path=os.path.join("artifacts", "data.csv")):
+        try:
+            entries = []
+            with open(data_path, encoding="utf-8") as data:
+                for row in csv.DictReader(data):
+                    titles = parseList(row["Title"])
+                    entries.append({
+                        "id": row["Id"],
+                        "title": titles[0] if titles else "",
+                        "titles": titles,
+                        "genres": [genre for genre in parseList(row["Genres"]) if genre != "Unknown"],
+                        "themes": [theme for theme in parseList(row["Themes"]) if theme != "Unknown"],
+                        "demographics": parseList(row["Demographics"]),
+                        "episodes": row["Episodes"],
+                        "url": row["ImageURLS"]
+                    })
+            return cls(entries)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def lookup(self, title):
+        return self._by_title.get((title or "").strip().lower())
+
+    def candidates(self, documents):
+        """Display fields for retrieved documents, in retrieval order, looked up by MAL Id.
+
+        The index text is never parsed for display, so candidates look the same
+        whichever layout the index was built with.
+        """
+        candidates = []
+        for document in documents:
+            anime_id = documentId(document)
+            entry = self._by_id.get(anime_id)
+            if entry is None:
+                logging.warning(f"Retrieved anime {anime_id} is not in the catalog, skipping it")
+                continue
+            candidates.append({
+                "id": entry["id"],
+                "title": entry["title"],
+                "titles": entry["titles"],
+                "genre": ", ".join(entry["genres"]),
+                "theme": ", ".join(entry["themes"]),
+                "url": entry["url"]
+            })
+        return candidates
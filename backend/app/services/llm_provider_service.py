@@ -0,0 +1,315 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+
+from src.logger import logging
+from backend.app.utils.metrics import metrics
+
+
+class LLMUnavailable(Exception):
+    """No provider produced a valid response"""
+
+
+class LLMDeadlineExceeded(LLMUnavailable, TimeoutError):
+    """The per-request deadline passed before any provider answered"""
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window=200, min_samples=20, default_seconds=8.0):
+        self.min_samples = min_samples
+        self.default_seconds = default_seconds
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percentile):
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.default_seconds
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over the last `window` calls.
+
+    Opens when at least `min_calls` outcomes are recorded and the share of
+    failures reaches `error_threshold`. After `cooldown_seconds` one trial call
+    is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, window=20, min_calls=5, error_threshold=0.5, cooldown_seconds=30.0):
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def release_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self.cooldown_seconds:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record(self, success):
+        with self._lock:
+            if self._opened_at is not None:
+                self._trial_in_flight = False
+                if success:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_threshold:
+                self._opened_at = time.monotonic()
+
+
+class Provider:
+    """A named LLM runnable with its own latency history and circuit breaker"""
+
+    def __init__(self, name, runnable, breaker=None, latency=None):
+        self.name = name
+        self.runnable = runnable
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = latency or LatencyTracker()
+
+    def _record(self, success):
+        self.breaker.record(success)
+        metrics.set_gauge(f"llm.provider.{self.name}.circuit_open", int(self.breaker.is_open))
+
+    async def call(self, value):
+        metrics.inc(f"llm.provider.{self.name}.calls")
+        started = time.monotonic()
+        try:
+            result = await self.runnable.ainvoke(value)
+        except asyncio.CancelledError:
+            # A cancelled call says nothing about the provider's health.
+            self.breaker.release_trial()
+            metrics.inc(f"llm.provider.{self.name}.cancelled")
+            raise
+        except Exception:
+            self._record(False)
+            metrics.inc(f"llm.provider.{self.name}.failures")
+            raise
+        elapsed = time.monotonic() - started
+        self.latency.record(elapsed)
+        metrics.observe(f"llm.provider.{self.name}.latency_seconds", elapsed)
+        return result
+
+
+class BackgroundLoop:
+    """A single long-lived event loop on a daemon thread for synchronous callers.
+
+    Async chat clients keep connections bound to the loop they were first used
+    on, so sync calls from the API's threadpool all have to run on this one
+    loop instead of a fresh asyncio.run() loop per request.
+    """
+
+    def __init__(self, name="llm-event-loop"):
+        self.name = name
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def run(self, coroutine):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+
+background_loop = BackgroundLoop()
+
+
+class HedgedLLM:
+    """Runs a structured LLM call across a cascade of providers.
+
+    The first healthy provider is called right away. If it has not answered by
+    its `hedge_percentile` latency, the next healthy provider is called too,
+    and a provider that fails outright is replaced by the next one at once.
+    The first response that passes `validate` wins and every other in-flight
+    call is cancelled. The whole call is bounded by `deadline_seconds`.
+    """
+
+    def __init__(self, providers, validate, hedge_percentile=95.0, deadline_seconds=30.0):
+        self.providers = providers
+        self.validate = validate
+        self.hedge_percentile = hedge_percentile
+        self.deadline_seconds = deadline_seconds
+        self._requests = 0
+        self._hedged = 0
+        self._lock = threading.Lock()
+
+    def _publish(self, hedged):
+        with self._lock:
+            self._requests += 1
+            self._hedged += int(hedged)
+            hedge_rate = self._hedged / self._requests
+        metrics.inc("llm.requests")
+        if hedged:
+            metrics.inc("llm.hedged")
+        metrics.set_gauge("llm.hedge_rate", hedge_rate)
+
+    async def ainvoke(self, value, config=None):
+        deadline = time.monotonic() + self.deadline_seconds
+        queue = list(self.providers)
+        running = {}
+        trials = set()
+        hedged = False
+        last_error = None
+
+        def launch():
+            # Breakers are only consulted for providers we actually call, so a
+            # half-open trial slot is never claimed by a call that never happens.
+            while queue:
+                provider = queue.pop(0)
+                if provider.breaker.allow():
+                    task = asyncio.ensure_future(provider.call(value))
+                    running[task] = provider
+                    if provider.breaker.is_open:
+                        trials.add(task)
+                    return time.monotonic() + provider.latency.percentile(self.hedge_percentile)
+            return None
+
+        hedge_at = launch()
+        if hedge_at is None:
+            metrics.inc("llm.unavailable")
+            raise LLMUnavailable("All LLM providers have open circuits")
+        try:
+            while running:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                wake_at = min(deadline, hedge_at) if queue else deadline
+                done, _ = await asyncio.wait(
+                    running, timeout=max(0.0, wake_at - now), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    provider = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        logging.warning(f"LLM provider {provider.name} failed: {e}")
+                        continue
+                    if not self.validate(result):
+                        provider._record(False)
+                        metrics.inc(f"llm.provider.{provider.name}.invalid")
+                        last_error = ValueError(f"Invalid structured response from {provider.name}")
+                        continue
+                    provider._record(True)
+                    metrics.inc(f"llm.winner.{provider.name}")
+                    self._publish(hedged)
+                    return result
+
+                if queue and (not running or time.monotonic() >= hedge_at):
+                    is_hedge = bool(running)
+                    next_hedge_at = launch()
+                    if next_hedge_at is not None:
+                        hedged = hedged or is_hedge
+                        hedge_at = next_hedge_at
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            # Settle every call whose result we never looked at: one that
+            # finished alongside the winner still counts, and a trial cancelled
+            # before it started must give its half-open slot back.
+            for task, provider in running.items():
+                if task.cancelled():
+                    if task in trials:
+                        provider.breaker.release_trial()
+                elif task.exception() is None:
+                    provider._record(bool(self.validate(task.result())))
+
+        self._publish(hedged)
+        if time.monotonic() >= deadline:
+            metrics.inc("llm.deadline_exceeded")
+            raise LLMDeadlineExceeded(f"No LLM provider answered within {self.deadline_seconds}s")
+        metrics.inc("llm.unavailable")
+        raise LLMUnavailable(f"All LLM providers failed: {last_error}")
+
+    def invoke(self, value, config=None):
+        return background_loop.run(self.ainvoke(value))
+
+
+class FakeProvider:
+    """Local stand-in for a chat model with injected latency and failures.
+
+    `latency` is a number of seconds or a callable returning one, `failure_rate`
+    is the probability of raising, and `response` is returned (or called) on
+    success. Useful for exercising HedgedLLM without network access.
+    """
+
+    def __init__(self, response, latency=0.0, failure_rate=0.0, seed=None):
+        self.response = response
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.cancelled = 0
+        self._random = random.Random(seed)
+
+    async def ainvoke(self, value, config=None):
+        self.calls += 1
+        latency = self.latency() if callable(self.latency) else self.latency
+        try:
+            await asyncio.sleep(latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self._random.random() < self.failure_rate:
+            raise RuntimeError("Injected provider failure")
+        return self.response(value) if callable(self.response) else self.response
+
+
+def build_provider(name, runnable):
+    return Provider(
+        name=name,
+        runnable=runnable,
+        breaker=CircuitBreaker(
+            window=int(os.getenv("LLM_BREAKER_WINDOW", "20")),
+            min_calls=int(os.getenv("LLM_BREAKER_MIN_CALLS", "5")),
+            error_threshold=float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5")),
+            cooldown_seconds=float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30")),
+        ),
+        latency=LatencyTracker(
+            min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+            default_seconds=float(os.getenv("LLM_HEDGE_DEFAULT_SECONDS", "8")),
+        ),
+    )
+
+
+def build_hedged_llm(providers, schema):
+    return HedgedLLM(
+        providers=providers,
+        validate=lambda result: isinstance(result, schema),
+        hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+        deadline_seconds=float(os.getenv("LLM_DEADLINE_SECONDS", "30")),
+    )
@@ -0,0 +1,210 @@
+import os
+import sys
+import time
+import json
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+
+from src.exception import CustomException
+
+
+def session_key(token):
+    """Stable cache key for a session that does not keep the raw token around"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after `ttl_seconds`"""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            item = self._entries.pop(key, None)
+            return None if item is None else item[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CandidatePoolCache(TTLCache):
+    """Per-session pool of ranked candidates left over after the first LLM call.
+
+    Page 1 is the response generated by the retrieval chain. Every later page
+    is a slice of the remaining retrieved candidates, in retrieval order, and
+    is explained by the cheap page chain the first time it is requested.
+    Explained pages are cached per (page, page_size), since the slice depends
+    on both.
+    """
+
+    def __init__(self):
+        super().__init__(
+            max_entries=int(os.getenv("CANDIDATE_CACHE_MAX_SESSIONS", "1024")),
+            ttl_seconds=float(os.getenv("CANDIDATE_CACHE_TTL_SECONDS", "900"))
+        )
+
+    def store(self, token, query, message, recommendations, candidates):
+        try:
+            picked = {rec["title"].strip().lower() for rec in recommendations}
+            leftover = [
+                candidate for candidate in candidates
+                if not picked.intersection(title.lower() for title in candidate["titles"])
+            ]
+            self.set(session_key(token), {
+                "query": query,
+                "message": message,
+                "candidates": leftover,
+                "pages": {}
+            })
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def load(self, token):
+        return self.get(session_key(token))
+
+    def cached_page(self, pool, page, page_size):
+        with self._lock:
+            return pool["pages"].get((page, page_size))
+
+    def store_page(self, pool, page, page_size, recommendations):
+        with self._lock:
+            pool["pages"][(page, page_size)] = recommendations
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+class ResponseCache(TTLCache):
+    """Precomputed responses keyed by normalized query, filled by the batch pipeline"""
+
+    def __init__(self):
+        super().__init__(
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000")),
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+        )
+
+    def lookup(self, query):
+        return self.get(normalize_query(query))
+
+    def load_jsonl(self, path):
+        """Load successful records written by src/pipeline/batch_pipeline.py, returns how many were loaded"""
+        try:
+            loaded = 0
+            with open(path, encoding="utf-8") as results:
+                for line in results:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if "error" in record:
+                        continue
+                    self.set(normalize_query(record["query"]), {
+                        "message": record["message"],
+                        "recommendations": record["recommendations"],
+                        "candidates": record["candidates"]
+                    })
+                    loaded += 1
+            return loaded
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+class HistoryCache:
+    """Per-user watch-history pages and genre counts.
+
+    A new interaction shifts every page, so pages are dropped on write, but
+    genre counts are updated in place so they never have to be recounted.
+    Every write also bumps the entry's generation; a page or count fetched
+    before the write carries the old generation and is not stored.
+    """
+
+    def __init__(self):
+        max_users = int(os.getenv("HISTORY_CACHE_MAX_USERS", "4096"))
+        ttl_seconds = float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "600"))
+        self.histories = TTLCache(max_entries=max_users, ttl_seconds=ttl_seconds)
+        # Session -> users.user_id, so a cached dashboard load needs no Supabase call at all
+        self.identities = TTLCache(max_entries=max_users, ttl_seconds=ttl_seconds)
+        # Shared across users so an evicted and recreated entry never reuses a generation
+        self._generations = itertools.count()
+        self._lock = threading.Lock()
+
+    def user_id(self, token):
+        return self.identities.get(session_key(token))
+
+    def remember_user(self, token, user_id):
+        self.identities.set(session_key(token), user_id)
+
+    def forget(self, token, user_id=None):
+        """Drop a session's identity and its user's history, on logout or account deletion"""
+        cached_user_id = self.identities.pop(session_key(token))
+        with self._lock:
+            for stale in {cached_user_id, user_id} - {None}:
+                self.histories.pop(stale)
+
+    def history(self, user_id):
+        with self._lock:
+            history = self.histories.get(user_id)
+            if history is None:
+                history = {"pages": {}, "genre_counts": None, "generation": next(self._generations)}
+                self.histories.set(user_id, history)
+            return history
+
+    def _current(self, user_id, generation):
+        history = self.histories.get(user_id)
+        if history is None or history["generation"] != generation:
+            return None
+        return history
+
+    def store_page(self, user_id, generation, key, page):
+        with self._lock:
+            history = self._current(user_id, generation)
+            if history is not None:
+                history["pages"][key] = page
+
+    def set_genre_counts(self, user_id, generation, genre_counts):
+        genre_counts = dict(sorted(genre_counts.items(), key=lambda item: -item[1]))
+        with self._lock:
+            history = self._current(user_id, generation)
+            if history is not None:
+                history["genre_counts"] = genre_counts
+        return genre_counts
+
+    def record_view(self, user_id, genres):
+        """Apply a new interaction: drop the cached pages and count the anime's genres"""
+        with self._lock:
+            history = self.histories.get(user_id)
+            if history is None:
+                return
+            history["generation"] = next(self._generations)
+            history["pages"] = {}
+            if history["genre_counts"] is not None:
+                genre_counts = dict(history["genre_counts"])
+                for genre in genres:
+                    genre_counts[genre] = genre_counts.get(genre, 0) + 1
+                history["genre_counts"] = dict(sorted(genre_counts.items(), key=lambda item: -item[1]))
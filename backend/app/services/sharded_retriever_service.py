@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import zlib
+import heapq
+import resource
+import argparse
+import threading
+import multiprocessing
+from typing import Any, List
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pydantic import PrivateAttr
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import documentId
+from backend.app.utils.metrics import metrics
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+MANIFEST_FILE = "manifest.json"
+
+
+class _QueryOnlyEmbeddings(Embeddings):
+    """Shards are only searched by vector, so workers never need a real embedding model"""
+
+    def embed_documents(self, texts):
+        raise NotImplementedError("Shard workers search by vector only")
+
+    def embed_query(self, text):
+        raise NotImplementedError("Shard workers search by vector only")
+
+
+def shard_key(document, strategy):
+    if strategy == "demographic":
+        return str(document.metadata.get("Demographic", "Unknown"))
+    return documentId(document)
+
+
+def build_shards(db, output_dir, num_shards, strategy="id"):
+    """Partition a loaded FAISS store into `num_shards` stores without re-embedding.
+
+    With `strategy="id"` documents are spread by a stable hash of their MAL Id;
+    with `strategy="demographic"` each demographic is kept whole and the
+    demographics are dealt round-robin across shards.
+    """
+    try:
+        vectors = db.index.reconstruct_n(0, db.index.ntotal)
+        documents = {position: db.docstore.search(doc_id) for position, doc_id in db.index_to_docstore_id.items()}
+        if strategy == "demographic":
+            keys = sorted({shard_key(document, strategy) for document in documents.values()})
+            assignment = {key: index % num_shards for index, key in enumerate(keys)}
+            shard_for = lambda document: assignment[shard_key(document, strategy)]
+        else:
+            shard_for = lambda document: zlib.crc32(shard_key(document, strategy).encode("utf-8")) % num_shards
+
+        partitions = [[] for _ in range(num_shards)]
+        for position, document in documents.items():
+            partitions[shard_for(document)].append((db.index_to_docstore_id[position], document, vectors[position]))
+        empty = [shard for shard, rows in enumerate(partitions) if not rows]
+        if empty:
+            raise ValueError(f"Shards {empty} would be empty, use fewer shards for strategy '{strategy}'")
+
+        os.makedirs(output_dir, exist_ok=True)
+        for shard, rows in enumerate(partitions):
+            shard_db = FAISS.from_embeddings(
+                text_embeddings=[(document.page_content, vector) for _, document, vector in rows],
+                embedding=_QueryOnlyEmbeddings(),
+                metadatas=[document.metadata for _, document, _ in rows],
+                ids=[doc_id for doc_id, _, _ in rows],
+                distance_strategy=db.distance_strategy,
+            )
+            shard_db.save_local(os.path.join(output_dir, f"shard_{shard}"))
+
+        with open(os.path.join(output_dir, MANIFEST_FILE), "w") as manifest:
+            json.dump({
+                "num_shards": num_shards,
+                "strategy": strategy,
+                "distance_strategy": db.distance_strategy.value,
+                "sizes": [len(rows) for rows in partitions],
+            }, manifest, indent=2)
+        return output_dir
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def load_shard(path):
+    return FAISS.load_local(path, _QueryOnlyEmbeddings(), allow_dangerous_deserialization=True)
+
+
+def search_shard(shard_db, vector, k):
+    return shard_db.similarity_search_with_score_by_vector(vector, k=k)
+
+
+def _rss_mb():
+    # Peak RSS (ru_maxrss) survives exec on Linux, so a spawned worker would
+    # report its parent's peak; prefer the current resident size when available.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def shard_stats(shard_db):
+    return {
+        "pid": os.getpid(),
+        "documents": shard_db.index.ntotal,
+        "rss_mb": _rss_mb(),
+    }
+
+
+# Process-mode workers hold exactly one shard each, loaded once by the pool initializer.
+_WORKER_SHARD = None
+
+
+def _init_worker(path):
+    global _WORKER_SHARD
+    _WORKER_SHARD = load_shard(path)
+
+
+def _worker_search(vector, k):
+    return search_shard(_WORKER_SHARD, vector, k)
+
+
+def _worker_stats():
+    return shard_stats(_WORKER_SHARD)
+
+
+def _spawn_worker(path):
+    context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker, initargs=(path,))
+
+
+class ShardedRetriever(BaseRetriever):
+    """Scatter-gather retriever over N FAISS shards.
+
+    The query is embedded once, every shard returns its own top-k, and the
+    union is merged by score. Since each document lives in exactly one shard,
+    the global top-k is always contained in that union, so the ranking matches
+    a single index over the full catalog.
+
+    With `workers="process"` each shard lives in its own process, so no
+    process holds more than one shard. With `workers="thread"` all shards are
+    loaded in-process and searched in parallel threads (FAISS releases the GIL).
+    A shard worker that dies is respawned and its search retried once.
+    """
+
+    embeddings: Any
+    k: int = 50
+    workers: str = "process"
+    higher_is_better: bool = False
+    executors: List[Any] = []
+    shards: List[Any] = []
+    paths: List[str] = []
+    _restart_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def from_directory(cls, shards_dir, embeddings, k=50, workers="process"):
+        try:
+            with open(os.path.join(shards_dir, MANIFEST_FILE)) as manifest_file:
+                manifest = json.load(manifest_file)
+            paths = [os.path.join(shards_dir, f"shard_{shard}") for shard in range(manifest["num_shards"])]
+            higher_is_better = manifest["distance_strategy"] in (
+                DistanceStrategy.MAX_INNER_PRODUCT.value,
+                DistanceStrategy.JACCARD.value,
+            )
+
+            if workers == "process":
+                executors = [_spawn_worker(path) for path in paths]
+                # Workers spawn lazily; load every shard now so startup fails
+                # loudly and the first query does not pay for it.
+                for warmup in [executor.submit(_worker_stats) for executor in executors]:
+                    warmup.result()
+                shards = []
+            else:
+                shards = [load_shard(path) for path in paths]
+                executors = [ThreadPoolExecutor(max_workers=len(paths), thread_name_prefix="faiss-shard")]
+
+            return cls(
+                embeddings=embeddings,
+                k=k,
+                workers=workers,
+                higher_is_better=higher_is_better,
+                executors=executors,
+                shards=shards,
+                paths=paths,
+            )
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _restart_worker(self, index, broken):
+        with self._restart_lock:
+            # Concurrent queries see the same dead worker; only the first one respawns it.
+            if self.executors[index] is broken:
+                logging.warning(f"Shard worker {index} died, respawning it")
+                metrics.inc("retriever.shard_restarts")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self.executors[index] = _spawn_worker(self.paths[index])
+            return self.executors[index]
+
+    def _submit(self, index, fn, *args):
+        executor = self.executors[index]
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            executor = self._restart_worker(index, executor)
+            return executor, executor.submit(fn, *args)
+
+    def _call_workers(self, fn, *args):
+        """Run `fn` on every shard worker, respawning a dead worker and retrying once"""
+        submitted = [self._submit(index, fn, *args) for index in range(len(self.executors))]
+        results = []
+        for index, (executor, future) in enumerate(submitted):
+            try:
+                results.append(future.result())
+            except BrokenProcessPool:
+                executor = self._restart_worker(index, executor)
+                results.append(executor.submit(fn, *args).result())
+        return results
+
+    def _scatter(self, vector, k):
+        if self.workers == "process":
+            return self._call_workers(_worker_search, vector, k)
+        futures = [self.executors[0].submit(search_shard, shard, vector, k) for shard in self.shards]
+        return [future.result() for future in futures]
+
+    def search_by_vector(self, vector, k=None):
+        """Global top-k (document, score) pairs across all shards"""
+        k = k or self.k
+        results = (pair for shard_results in self._scatter(vector, k) for pair in shard_results)
+        if self.higher_is_better:
+            return heapq.nlargest(k, results, key=lambda pair: pair[1])
+        return heapq.nsmallest(k, results, key=lambda pair: pair[1])
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        vector = self.embeddings.embed_query(query)
+        return [document for document, _ in self.search_by_vector(vector)]
+
+    def stats(self):
+        if self.workers == "process":
+            return self._call_workers(_worker_stats)
+        return [shard_stats(shard) for shard in self.shards]
+
+    def close(self):
+        for executor in self.executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    from src.logger import configure_logging
+    from backend.app.services.vector_db_service import load_vector_db
+
+    parser = argparse.ArgumentParser(description="Split artifacts/faiss_index into N shards")
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--strategy", choices=["id", "demographic"], default="id")
+    parser.add_argument("--output", default=os.path.join("artifacts", "faiss_shards"))
+    args = parser.parse_args()
+    configure_logging()
+
+    build_shards(load_vector_db(), args.output, args.shards, args.strategy)
+    print(f"Wrote {args.shards} shards to {args.output}")
@@ -10,4 +10,19 @@ def load_vector_db():
         db = FAISS.load_local("artifacts/faiss_index", OllamaEmbeddings(model='bge-m3:567m'), allow_dangerous_deserialization=True)
         return db
     except Exception as e:
-        raise CustomException(e, sys)
\ No newline at end of file
+        raise CustomException(e, sys)
+
+def load_retriever(k=50):
+    """Single in-process index by default, or a sharded scatter-gather retriever when RETRIEVER_MODE=sharded"""
+    try:
+        if os.getenv("RETRIEVER_MODE", "single") == "sharded":
+            from backend.app.services.sharded_retriever_service import ShardedRetriever
+            return ShardedRetriever.from_directory(
+                shards_dir=os.getenv("RETRIEVER_SHARDS_DIR", os.path.join("artifacts", "faiss_shards")),
+                embeddings=OllamaEmbeddings(model='bge-m3:567m'),
+                k=k,
+                workers=os.getenv("RETRIEVER_SHARD_WORKERS", "process")
+            )
+        return load_vector_db().as_retriever(search_kwargs={"k": k})
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -0,0 +1,38 @@
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """Small in-process registry of counters, gauges and summaries exposed at /api/metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._gauges = {}
+        self._summaries = {}
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, value):
+        with self._lock:
+            summary = self._summaries.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {name: dict(summary) for name, summary in self._summaries.items()},
+            }
+
+
+metrics = Metrics()
@@ -0,0 +1,111 @@
+import re
+import copy
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+FINGERPRINT_DIRS = ("css", "js")
+# href="css/index.css" / src="js/index.js" style references in the HTML pages
+ASSET_REFERENCE = re.compile(r'(href|src)="((?:css|js)/[^"/]+)"')
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class Asset:
+    """One file held in memory with its precompressed variants"""
+
+    def __init__(self, body, content_type, cache_control):
+        self.body = body
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.hash = hashlib.sha256(body).hexdigest()[:16]
+        self.encoded = {}
+        gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gzipped) < len(body):
+            self.encoded["gzip"] = gzipped
+        if brotli is not None:
+            brotlied = brotli.compress(body, quality=11)
+            if len(brotlied) < len(body):
+                self.encoded["br"] = brotlied
+
+    def with_cache_control(self, cache_control):
+        """Same bodies under a different caching policy, without compressing again"""
+        alias = copy.copy(self)
+        alias.cache_control = cache_control
+        return alias
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    """In-memory copy of frontend/ with fingerprinted CSS/JS and precompressed bodies.
+
+    CSS and JS files are served under content-hashed names (css/index.<hash>.css)
+    with immutable caching, and every HTML page is rewritten to reference those
+    names. HTML pages and the original un-hashed asset paths are revalidated
+    with their ETag, so a repeat visit costs a 304 at most.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.assets = {}
+        self.pages = {}
+        self.fingerprints = {}
+
+        for directory in FINGERPRINT_DIRS:
+            for path in sorted((self.root / directory).glob("*")):
+                if not path.is_file():
+                    continue
+                original = f"{directory}/{path.name}"
+                content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                asset = Asset(path.read_bytes(), content_type, IMMUTABLE)
+                fingerprinted = f"{directory}/{path.stem}.{asset.hash}{path.suffix}"
+                self.assets[fingerprinted] = asset
+                self.assets[original] = asset.with_cache_control(REVALIDATE)
+                self.fingerprints[original] = fingerprinted
+
+        for path in sorted(self.root.glob("*.html")):
+            html = path.read_text(encoding="utf-8")
+            html = ASSET_REFERENCE.sub(
+                lambda match: f'{match.group(1)}="/{self.fingerprints.get(match.group(2), match.group(2))}"',
+                html,
+            )
+            self.pages[path.stem] = Asset(html.encode("utf-8"), "text/html; charset=utf-8", REVALIDATE)
+
+    def response(self, request, asset):
+        headers = {
+            "Cache-Control": asset.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        accepted = accepted_encodings(request.headers.get("accept-encoding"))
+        body, etag = asset.body, asset.hash
+        for coding in ("br", "gzip"):
+            if coding in asset.encoded and coding in accepted:
+                body, etag = asset.encoded[coding], f"{asset.hash}-{coding}"
+                headers["Content-Encoding"] = coding
+                break
+        headers["ETag"] = f'"{etag}"'
+
+        # Any representation of the same content is still fresh for the client.
+        if_none_match = request.headers.get("if-none-match", "")
+        if asset.hash in if_none_match or if_none_match.strip() == "*":
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, headers=headers, media_type=asset.content_type)
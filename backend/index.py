@@ -1,16 +1,23 @@
 import uvicorn
+import os
 import sys
+import uuid
 from pathlib import Path
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 from src.exception import CustomException
+from src.logger import logging, configure_logging, set_request_id, reset_request_id
 from langchain_community.vectorstores import FAISS
 from langchain_ollama import OllamaEmbeddings
-from backend.app.services.RAG_init_service import load_retrieval_chain
-from backend.app.services.vector_db_service import load_vector_db
+from backend.app.services.RAG_init_service import load_retrieval_chain, load_page_chain
+from backend.app.services.recommendation_cache_service import CandidatePoolCache, ResponseCache, HistoryCache
+from backend.app.services.catalog_service import AnimeCatalog
+from backend.app.services.admission_service import load_admission_controller
+from backend.app.utils.metrics import metrics
+from backend.app.utils.static_assets import StaticAssets
+from backend.app.services.vector_db_service import load_retriever
 from backend.app.routes.anime_routes import anime_router
 from backend.app.routes.user_routes import user_router
 
@@ -25,15 +32,45 @@ app.add_middleware(
     expose_headers=["*"],  # Expose all headers to frontend
 )
 
+@app.middleware("http")
+async def bind_request_id(request: Request, call_next):
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = set_request_id(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        reset_request_id(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 @app.on_event("startup")
 async def load_pipeline():
     try:
-        db = load_vector_db()
-        app.state.db = db
-        app.state.retrieval_chain = load_retrieval_chain(db)
+        # Configured here rather than at import so spawned helper processes
+        # that re-import this module never attach their own file handler.
+        configure_logging()
+        retriever = load_retriever()
+        app.state.retriever = retriever
+        app.state.retrieval_chain = load_retrieval_chain(retriever)
+        app.state.page_chain = load_page_chain()
+        app.state.candidate_cache = CandidatePoolCache()
+        app.state.response_cache = ResponseCache()
+        app.state.history_cache = HistoryCache()
+        app.state.catalog = AnimeCatalog.load()
+        prewarm_path = os.getenv("RESPONSE_CACHE_PREWARM_PATH")
+        if prewarm_path and os.path.exists(prewarm_path):
+            loaded = app.state.response_cache.load_jsonl(prewarm_path)
+            logging.info(f"Pre-warmed response cache with {loaded} precomputed queries from {prewarm_path}")
+        app.state.admission = load_admission_controller()
     except Exception as e:
         raise CustomException(e, sys)
 
+@app.on_event("shutdown")
+async def close_pipeline():
+    retriever = getattr(app.state, "retriever", None)
+    if hasattr(retriever, "close"):
+        retriever.close()
+
 # Include API routers
 app.include_router(
     user_router,
@@ -46,43 +83,37 @@ app.include_router(
     tags=['Anime']
 )
 
-# Mount static files (frontend) - serve at root for relative paths to work
+@app.get("/api/metrics", tags=['Metrics'])
+def get_metrics():
+    return metrics.snapshot()
+
+# Frontend is loaded into memory once, with fingerprinted and precompressed assets
 frontend_path = Path(__file__).parent.parent / "frontend"
+static_assets = StaticAssets(frontend_path)
 
-# Serve CSS and JS files
-app.mount("/css", StaticFiles(directory=str(frontend_path / "css")), name="css")
-app.mount("/js", StaticFiles(directory=str(frontend_path / "js")), name="js")
+@app.api_route("/css/{file_name}", methods=["GET", "HEAD"])
+@app.api_route("/js/{file_name}", methods=["GET", "HEAD"])
+def serve_asset(file_name: str, request: Request):
+    asset = static_assets.assets.get(request.url.path.lstrip("/"))
+    if asset is None:
+        return JSONResponse(status_code=404, content={"error": "File not found"})
+    return static_assets.response(request, asset)
 
-@app.get("/")
+@app.api_route("/", methods=["GET", "HEAD"])
 def root(request: Request):
-    # Check if user is authenticated with valid token
-    token = request.cookies.get("access_token")
-    
-    if token:
-        try:
-            # Validate token with Supabase
-            from backend.app.utils.supabase_client import client
-            user_response = client.auth.get_user(jwt=token)
-            
-            if user_response.user:
-                # Valid token, redirect to dashboard
-                from fastapi.responses import RedirectResponse
-                return RedirectResponse(url="/home", status_code=302)
-        except Exception as e:
-            # Invalid token, clear it and show landing page
-            print(f"Invalid token: {e}")
-            pass
-    
-    # User not logged in or invalid token, show landing page
-    return FileResponse(str(frontend_path / "index.html"))
+    # A session cookie is enough to skip the landing page; the dashboard
+    # validates the token itself and sends invalid sessions to login.
+    if request.cookies.get("access_token"):
+        return RedirectResponse(url="/home", status_code=302)
+    return static_assets.response(request, static_assets.pages["index"])
 
 # Serve HTML pages without .html extension
-@app.get("/{page_name}")
-def serve_page(page_name: str):
+@app.api_route("/{page_name}", methods=["GET", "HEAD"])
+def serve_page(page_name: str, request: Request):
     # Map clean URLs to HTML files
-    file_path = frontend_path / f"{page_name}.html"
-    if file_path.exists():
-        return FileResponse(str(file_path))
+    asset = static_assets.pages.get(page_name)
+    if asset is not None:
+        return static_assets.response(request, asset)
     return {"error": "Page not found"}
 
 if __name__=="__main__":
@@ -0,0 +1,44 @@
+-- Watch history for the dashboard in a single round trip.
+-- Returns {"rows": [...], "anime_counts": {...} | null}: one keyset page of
+-- interactions (limit + 1 rows, newest first) and, when asked, how often each
+-- anime was viewed. Counts are aggregated here so the API never pulls every
+-- interaction row (and never hits PostgREST's max-rows cap); the API maps
+-- anime names to genres with its local catalog.
+create or replace function public.user_history(
+    p_user_id bigint,
+    p_cursor bigint default null,
+    p_limit integer default 20,
+    p_with_counts boolean default true
+)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'rows', coalesce((
+            select jsonb_agg(page order by page.interaction_id desc)
+            from (
+                select i.interaction_id, i.interaction_type, a.anime_name
+                from useranimeinteractions i
+                left join animes a on a.anime_id = i.anime_id
+                where i.user_id = p_user_id
+                  and (p_cursor is null or i.interaction_id < p_cursor)
+                order by i.interaction_id desc
+                limit p_limit + 1
+            ) page
+        ), '[]'::jsonb),
+        'anime_counts', case when p_with_counts then coalesce((
+            select jsonb_object_agg(counts.anime_name, counts.views)
+            from (
+                select a.anime_name, count(*) as views
+                from useranimeinteractions i
+                join animes a on a.anime_id = i.anime_id
+                where i.user_id = p_user_id
+                group by a.anime_name
+            ) counts
+        ), '{}'::jsonb) end
+    );
+$$;
+
+create index if not exists useranimeinteractions_user_id_interaction_id_idx
+    on useranimeinteractions (user_id, interaction_id desc);
@@ -0,0 +1,154 @@
+"""Embedding throughput and retrieval recall: combined document blob vs split text + metadata.
+
+"before" is the old generateDocuments layout (Id, every title, genres,
+themes, episodes and image URL in one embedded blob). "after" embeds only
+generateEmbeddingText and keeps the rest in metadata.
+
+Two query sets are built from artifacts/data.csv:
+  * alias   - one alternative title per anime, the anime itself is relevant
+  * filters - "<genre> <genre> anime about <theme>", every anime having both
+              genres and the theme is relevant
+
+    python -m benchmarks.bench_document_split                      # bge-m3 via Ollama
+    python -m benchmarks.bench_document_split --embeddings hash    # offline
+"""
+import re
+import time
+import zlib
+import pickle
+import random
+import argparse
+
+import faiss
+import numpy as np
+import pandas as pd
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+from src.utils import parseList, generateEmbeddingText, generateMetadata
+
+
+def legacy_text(row):
+    titles = ", ".join(parseList(row['Title']))
+    genres = ", ".join(parseList(row['Genres']))
+    themes = ", ".join(parseList(row['Themes']))
+    return "\n".join([
+        f"Id: {row['Id']}",
+        f"Title: {titles}",
+        f"Genre: {genres}",
+        f"Theme: {themes}",
+        f"Episodes: {row['Episodes']},",
+        f"ImageURLS: {row['ImageURLS']}",
+    ])
+
+
+class HashEmbeddings(Embeddings):
+    """Feature-hashed bag of words, so the benchmark runs without an embedding server"""
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def build_queries(rows, num_queries, seed):
+    rng = random.Random(seed)
+    alias_queries = []
+    for row in rows:
+        titles = parseList(row['Title'])
+        if len(titles) > 1:
+            alias_queries.append((rng.choice(titles[1:]), {int(row['Id'])}))
+    rng.shuffle(alias_queries)
+
+    filter_queries = []
+    candidates = [row for row in rows if len(parseList(row['Genres'])) >= 2 and parseList(row['Themes']) != ['Unknown']]
+    for row in rng.sample(candidates, min(num_queries, len(candidates))):
+        genres = rng.sample(parseList(row['Genres']), 2)
+        theme = rng.choice(parseList(row['Themes']))
+        relevant = {
+            int(other['Id']) for other in rows
+            if set(genres) <= set(parseList(other['Genres'])) and theme in parseList(other['Themes'])
+        }
+        filter_queries.append((f"{genres[0]} {genres[1]} anime about {theme}", relevant))
+    return {"alias": alias_queries[:num_queries], "filters": filter_queries}
+
+
+def evaluate(name, texts, metadatas, embeddings, queries, k, batch_size):
+    started = time.perf_counter()
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(embeddings.embed_documents(texts[start:start + batch_size]))
+    elapsed = time.perf_counter() - started
+
+    db = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, metadatas=metadatas)
+    index_bytes = len(faiss.serialize_index(db.index))
+    docstore_bytes = len(pickle.dumps((db.docstore, db.index_to_docstore_id)))
+
+    recalls = {}
+    for query_set, pairs in queries.items():
+        scores = []
+        for query, relevant in pairs:
+            found = {doc.metadata["Id"] for doc in db.similarity_search(query, k=k)}
+            scores.append(len(found & relevant) / min(k, len(relevant)))
+        recalls[query_set] = sum(scores) / len(scores) if scores else 0.0
+
+    return {
+        "variant": name,
+        "docs_per_second": len(texts) / elapsed,
+        "avg_chars": sum(map(len, texts)) / len(texts),
+        "index_kb": index_bytes / 1024,
+        "docstore_kb": docstore_bytes / 1024,
+        **{f"recall@{k} {query_set}": value for query_set, value in recalls.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default="artifacts/data.csv")
+    parser.add_argument("--embeddings", choices=["ollama", "hash"], default="ollama")
+    parser.add_argument("--model", default="bge-m3:567m")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N anime")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data, encoding="utf-8")
+    rows = [row for _, row in data.head(args.limit or len(data)).iterrows()]
+    if args.embeddings == "ollama":
+        from langchain_ollama import OllamaEmbeddings
+        embeddings = OllamaEmbeddings(model=args.model)
+    else:
+        embeddings = HashEmbeddings()
+
+    queries = build_queries(rows, args.queries, args.seed)
+    metadatas = [generateMetadata(row) for row in rows]
+    results = [
+        evaluate("before", [legacy_text(row) for row in rows], metadatas, embeddings, queries, args.k, args.batch_size),
+        evaluate("after", [generateEmbeddingText(row) for row in rows], metadatas, embeddings, queries, args.k, args.batch_size),
+    ]
+
+    print(f"docs={len(rows)} embeddings={args.embeddings} k={args.k} "
+          f"queries: alias={len(queries['alias'])} filters={len(queries['filters'])}")
+    columns = list(results[0])
+    print("  ".join(f"{column:>18}" for column in columns))
+    for result in results:
+        print("  ".join(
+            f"{value:>18.3f}" if isinstance(value, float) else f"{value:>18}" for value in result.values()
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Search latency and per-process memory of ShardedRetriever vs shard count.
+
+Builds a synthetic catalog (random bge-m3 sized vectors, no Ollama needed),
+splits it with build_shards for every shard count, and reports p50/p95 search
+latency, resident memory of the largest shard process, and recall@k against the
+unsharded index (which must stay at 1.0).
+
+    python -m benchmarks.bench_sharded_retrieval --docs 100000 --shards 1 2 4 8
+"""
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from backend.app.services.sharded_retriever_service import ShardedRetriever, build_shards, _QueryOnlyEmbeddings
+
+DEMOGRAPHICS = ["Shounen", "Seinen", "Shoujo", "Josei", "Kids", "Unknown"]
+
+
+def build_catalog(num_docs, dim, seed):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((num_docs, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    db = FAISS.from_embeddings(
+        text_embeddings=[(f"Id: {i}\nTitle: Anime {i}", vectors[i]) for i in range(num_docs)],
+        embedding=_QueryOnlyEmbeddings(),
+        metadatas=[{"Id": i, "Demographic": DEMOGRAPHICS[i % len(DEMOGRAPHICS)]} for i in range(num_docs)],
+    )
+    return db, rng
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--workers", choices=["process", "thread"], default="process")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    db, rng = build_catalog(args.docs, args.dim, args.seed)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    expected = [
+        {doc.metadata["Id"] for doc, _ in db.similarity_search_with_score_by_vector(query, k=args.k)}
+        for query in queries
+    ]
+
+    print(f"docs={args.docs} dim={args.dim} k={args.k} queries={args.queries} workers={args.workers}")
+    print(f"{'shards':>6} {'p50 ms':>9} {'p95 ms':>9} {'max shard docs':>15} {'max RSS/process MB':>19} {'recall@k':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_shards in args.shards:
+            shards_dir = os.path.join(tmp, f"shards_{num_shards}")
+            build_shards(db, shards_dir, num_shards, strategy="id")
+            retriever = ShardedRetriever.from_directory(shards_dir, embeddings=None, k=args.k, workers=args.workers)
+            try:
+                retriever.search_by_vector(queries[0])  # warm up workers
+
+                latencies, hits = [], 0
+                for query, relevant in zip(queries, expected):
+                    started = time.perf_counter()
+                    results = retriever.search_by_vector(query)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    hits += len(relevant & {doc.metadata["Id"] for doc, _ in results})
+
+                stats = retriever.stats()
+                p95 = statistics.quantiles(latencies, n=20)[-1]
+                print(
+                    f"{num_shards:>6} {statistics.median(latencies):>9.2f} {p95:>9.2f} "
+                    f"{max(s['documents'] for s in stats):>15} {max(s['rss_mb'] for s in stats):>19.1f} "
+                    f"{hits / (len(queries) * args.k):>9.3f}"
+                )
+            finally:
+                retriever.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -43,14 +43,16 @@ async function checkAuth() {
 // Load user's anime from database
 async function loadUserAnime() {
     try {
-        // TODO: Replace with actual API endpoint to fetch user's watched anime
-        // For now, we'll check localStorage or return empty
-        const storedAnime = localStorage.getItem('userAnime');
-        
-        if (storedAnime) {
-            const animeList = JSON.parse(storedAnime);
-            if (animeList && animeList.length > 0) {
-                displayAnimeGrid(animeList);
+        // First page of the user's watch history, newest first
+        const response = await fetch(`${API_BASE_URL}/api/users/history?limit=24`, {
+            method: 'GET',
+            credentials: 'include'
+        });
+
+        if (response.ok) {
+            const result = await response.json();
+            if (result.items && result.items.length > 0) {
+                displayAnimeGrid(result.items);
                 return;
             }
         }
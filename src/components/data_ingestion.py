@@ -82,6 +82,7 @@ class DataIngestion:
             urls = generateImage(data=data)
             ids = extract_features(data=data, feature_name="mal_id")
             episodes = extract_features(data=data, feature_name="episodes")
+            synopses = extract_features(data=data, feature_name="synopsis")
             
             logging.info("Features extracted successfully")
             
@@ -93,7 +94,8 @@ class DataIngestion:
                     "Themes": themes,
                     "Demographics": demographics,
                     "Episodes": episodes,
-                    "ImageURLS": urls
+                    "ImageURLS": urls,
+                    "Synopsis": synopses
                 }
             )
             logging.info("Features converted into .csv format successfully")
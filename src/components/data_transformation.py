@@ -5,6 +5,7 @@ import pandas as pd
 from dotenv import load_dotenv
 from src.exception import CustomException
 from src.logger import logging
+from dataclasses import dataclass
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
@@ -15,15 +16,26 @@ from langchain_groq import ChatGroq
 from langchain_ollama import OllamaEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
 
+@dataclass
+class DataTransformationConfig():
+    index_path = os.path.join("artifacts", "faiss_index")
+    # Append the Jikan synopsis to the embedded text (needs a Synopsis column from DataIngestion)
+    include_synopsis = os.getenv("EMBED_SYNOPSIS", "false").lower() == "true"
+
 class DataTransformation:
+    def __init__(self):
+        self.transformation_config = DataTransformationConfig()
+    
     def transformFeatures(self, data_path):
         try:
-            data = pd.read_csv(data_path, encoding='latin')
-            documents = data.apply(generateDocuments, axis=1)
-            logging.info("Features combined successfully")
-            data['combined_text'] = documents
+            data = pd.read_csv(data_path, encoding='utf-8')
+            include_synopsis = self.transformation_config.include_synopsis and 'Synopsis' in data.columns
+            documents = [generateDocuments(row, include_synopsis=include_synopsis) for _, row in data.iterrows()]
+            logging.info("Embedding text and metadata generated successfully")
             
-            docs = [Document(page_content=row['combined_text'], metadata={"Demographic": row['Demographics']}) for _, row in data.iterrows()] 
+            # Only the compact text is embedded; Id, image URL, episodes and
+            # demographics ride along in metadata for display.
+            docs = [Document(page_content=text, metadata=metadata) for text, metadata in documents]
             logging.info("Data frame converted into langchain document done successfully")
             
             logging.info("Divide the converted documents into chunks")
@@ -34,7 +46,6 @@ class DataTransformation:
             embeddings = OllamaEmbeddings(model='bge-m3:567m')
             db = FAISS.from_documents(documents=docs[:128], embedding=embeddings)
             logging.info("Vector embeddingsa and stored successfully")
-            db.save_local("artifacts/faiss_index")
+            db.save_local(self.transformation_config.index_path)
         except Exception as e:
             raise CustomException(e, sys)
-        
\ No newline at end of file
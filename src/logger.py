@@ -1,18 +1,129 @@
 import logging
-import sys
+import logging.handlers
 import os
-from datetime import datetime
+import json
+import queue
+import atexit
+import random
+import contextvars
+from datetime import datetime, timezone
 
 
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-log_path = os.path.join(os.getcwd(), "logs", LOG_FILE)
+LOG_DIR = os.path.join(os.getcwd(), "logs")
+LOG_FILE_PATH = os.path.join(LOG_DIR, os.getenv("LOG_FILE", "app.log"))
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Large payloads (LLM responses, retrieved context) are truncated to this many
+# characters and only attached to this fraction of records.
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))
 
-os.makedirs(log_path, exist_ok=True)
+request_id_var = contextvars.ContextVar("request_id", default="-")
 
-LOG_FILE_PATH = os.path.join(log_path, LOG_FILE)
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)   
\ No newline at end of file
+
+def set_request_id(request_id):
+    """Bind a request id to the current context, returns a token for `reset_request_id`"""
+    return request_id_var.set(request_id)
+
+
+def reset_request_id(token):
+    request_id_var.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp the request id on the record in the calling thread, before it is queued"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class PayloadFilter(logging.Filter):
+    """Sample and truncate the `payload` extra so big objects never reach the queue whole"""
+
+    def filter(self, record):
+        if getattr(record, "payload", None) is None:
+            return True
+        if random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+            record.payload = None
+            record.payload_sampled_out = True
+            return True
+        payload = str(record.payload)
+        if len(payload) > LOG_PAYLOAD_MAX_CHARS:
+            record.payload_truncated = len(payload)
+            payload = payload[:LOG_PAYLOAD_MAX_CHARS]
+        record.payload = payload
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "lineno": record.lineno,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and key not in entry and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the listener falls behind"""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+listener = None
+
+
+def configure_logging():
+    """Attach the queue handler and start the file listener; call once from each entry point.
+
+    Nothing is configured on import, so helper processes that import `src.*`
+    (spawned shard workers, for instance) never open their own rotating
+    handler on the shared log file.
+    """
+    global listener
+    if listener is not None:
+        return listener
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE_PATH,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(PayloadFilter())
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import formatContext
+from backend.app.services.catalog_service import AnimeCatalog
+from backend.app.services.recommendation_cache_service import normalize_query
+
+
+@dataclass
+class BatchRecommendationConfig():
+    input_path: str = os.path.join("artifacts", "batch_queries.jsonl")
+    output_path: str = os.path.join("artifacts", "batch_results.jsonl")
+    concurrency: int = 4
+    # Limits retrieval chain invocations, not provider calls: a hedged or
+    # failed-over query also calls the next provider in the cascade, so the
+    # total can reach this times the number of providers (each provider still
+    # sees at most this rate, plus any client-side retries).
+    requests_per_second: float = 1.0
+    # Gemini 2.5 Flash list prices, USD per 1M tokens
+    input_price_per_1m: float = 0.30
+    output_price_per_1m: float = 2.50
+    # System prompt and template text sent with every query, in tokens
+    prompt_overhead_tokens: int = 700
+
+
+class RateLimiter:
+    """Token bucket shared by all workers, `rate` requests per second with bursts of `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for cost reporting
+    return max(1, len(text) // 4)
+
+
+class BatchRecommendation:
+    """Runs queries from a JSONL file through the API's retrieval chain and writes results as JSONL.
+
+    Each input line is {"query": "..."}. Each output line is written and
+    fsynced as soon as its query finishes, so a crashed run can be resumed:
+    queries that already have a successful result are skipped, failed ones
+    are retried. A failed query is recorded and the run goes on, but if a
+    result cannot be written the whole run stops.
+    """
+
+    def __init__(self, config=None, retrieval_chain=None, catalog=None):
+        self.batch_config = config or BatchRecommendationConfig()
+        self.retrieval_chain = retrieval_chain
+        self.catalog = catalog or AnimeCatalog.load()
+
+    def completed_queries(self):
+        done = set()
+        if not os.path.exists(self.batch_config.output_path):
+            return done
+        with open(self.batch_config.output_path, encoding="utf-8") as results:
+            for line in results:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                if "error" not in record:
+                    done.add(normalize_query(record["query"]))
+        return done
+
+    def pending_queries(self, done):
+        """Stream queries from the input file, skipping duplicates and finished ones"""
+        seen = set(done)
+        with open(self.batch_config.input_path, encoding="utf-8") as queries:
+            for line in queries:
+                line = line.strip()
+                if not line:
+                    continue
+                query = json.loads(line)["query"]
+                key = normalize_query(query)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield query
+
+    def to_record(self, query, result, latency):
+        response = result["response"]
+        recommendations = [
+            {
+                "title": rec.title,
+                "genre": rec.genre,
+                "url": rec.url,
+                "reason": rec.reason
+            }
+            for rec in response.recommendations
+        ]
+        input_tokens = (
+            self.batch_config.prompt_overhead_tokens
+            + estimate_tokens(query)
+            + estimate_tokens(formatContext(result["context"]))
+        )
+        output_tokens = estimate_tokens(response.model_dump_json())
+        cost = (
+            input_tokens * self.batch_config.input_price_per_1m
+            + output_tokens * self.batch_config.output_price_per_1m
+        ) / 1_000_000
+        return {
+            "query": query,
+            "message": response.message,
+            "recommendations": recommendations,
+            "candidates": self.catalog.candidates(result["context"]),
+            "latency_seconds": round(latency, 3),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "estimated_cost_usd": round(cost, 6)
+        }
+
+    async def run(self):
+        try:
+            config = self.batch_config
+            done = self.completed_queries()
+            logging.info(f"Batch recommendation run, {len(done)} queries already completed")
+
+            os.makedirs(os.path.dirname(config.output_path) or ".", exist_ok=True)
+            # A crash can leave a half-written last line; start ours on a fresh one.
+            torn = False
+            if os.path.exists(config.output_path) and os.path.getsize(config.output_path) > 0:
+                with open(config.output_path, "rb") as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    torn = existing.read(1) != b"\n"
+            output = open(config.output_path, "a", encoding="utf-8")
+            if torn:
+                output.write("\n")
+
+            limiter = RateLimiter(config.requests_per_second, burst=config.concurrency)
+            queue = asyncio.Queue(maxsize=config.concurrency * 2)
+            stats = {"succeeded": 0, "failed": 0, "cost": 0.0}
+
+            def write(record):
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                os.fsync(output.fileno())
+
+            async def worker():
+                while True:
+                    query = await queue.get()
+                    if query is None:
+                        return
+                    await limiter.acquire()
+                    started = time.monotonic()
+                    try:
+                        result = await self.retrieval_chain.ainvoke(query)
+                        record = self.to_record(query, result, time.monotonic() - started)
+                        stats["succeeded"] += 1
+                        stats["cost"] += record["estimated_cost_usd"]
+                    except Exception as e:
+                        logging.warning(f"Batch query failed: {query}: {e}")
+                        record = {"query": query, "error": str(e)}
+                        stats["failed"] += 1
+                    write(record)
+                    total = stats["succeeded"] + stats["failed"]
+                    if total % 50 == 0:
+                        print(f"{total} queries processed ({stats['failed']} failed)")
+
+            async def producer():
+                for query in self.pending_queries(done):
+                    await queue.put(query)
+                for _ in range(config.concurrency):
+                    await queue.put(None)
+
+            started = time.monotonic()
+            # A worker that cannot write its result raises out of here; every
+            # other task is cancelled so the producer is not left blocked on a
+            # full queue.
+            tasks = [asyncio.create_task(producer())] + [asyncio.create_task(worker()) for _ in range(config.concurrency)]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                logging.error(f"Batch recommendation run aborted, rerun to resume from {config.output_path}")
+                raise
+            finally:
+                output.close()
+            elapsed = time.monotonic() - started
+
+            total = stats["succeeded"] + stats["failed"]
+            report = {
+                "processed": total,
+                "succeeded": stats["succeeded"],
+                "failed": stats["failed"],
+                "skipped": len(done),
+                "elapsed_seconds": round(elapsed, 2),
+                "queries_per_second": round(total / elapsed, 3) if elapsed > 0 else 0.0,
+                "estimated_cost_usd": round(stats["cost"], 4),
+                "estimated_cost_per_query_usd": round(stats["cost"] / stats["succeeded"], 6) if stats["succeeded"] else 0.0
+            }
+            logging.info(f"Batch recommendation run finished: {report}")
+            return report
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__=="__main__":
+    from src.logger import configure_logging
+    from backend.app.services.vector_db_service import load_retriever
+    from backend.app.services.RAG_init_service import load_retrieval_chain
+
+    defaults = BatchRecommendationConfig()
+    parser = argparse.ArgumentParser(description="Precompute recommendations for a JSONL file of queries")
+    parser.add_argument("--input", default=defaults.input_path, help='JSONL file with one {"query": ...} per line')
+    parser.add_argument("--output", default=defaults.output_path, help="JSONL results file, appended to and resumable")
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--rps", type=float, default=defaults.requests_per_second, help="Queries started per second; hedging can add one provider call per extra provider")
+    parser.add_argument("--input-price", type=float, default=defaults.input_price_per_1m, help="USD per 1M input tokens")
+    parser.add_argument("--output-price", type=float, default=defaults.output_price_per_1m, help="USD per 1M output tokens")
+    args = parser.parse_args()
+    configure_logging()
+
+    config = BatchRecommendationConfig(
+        input_path=args.input,
+        output_path=args.output,
+        concurrency=args.concurrency,
+        requests_per_second=args.rps,
+        input_price_per_1m=args.input_price,
+        output_price_per_1m=args.output_price
+    )
+    batchObj = BatchRecommendation(config=config, retrieval_chain=load_retrieval_chain(load_retriever()))
+    report = asyncio.run(batchObj.run())
+    print(json.dumps(report, indent=2))
+    print(f"Load into the API with RESPONSE_CACHE_PREWARM_PATH={config.output_path}")
@@ -1,10 +1,12 @@
 import os
 import sys
 
+from src.logger import configure_logging
 from src.components.data_ingestion import DataIngestion
 from src.components.data_transformation import DataTransformation
 
 if __name__=="__main__":
+    configure_logging()
     ingestionObj = DataIngestion()
     path = ingestionObj.extract_necessary_records()
     
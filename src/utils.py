@@ -1,5 +1,6 @@
 import os
 import sys
+import ast
 
 from src.exception import CustomException
 from src.logger import logging
@@ -36,20 +37,90 @@ def extract_features(data, feature_name):
         raise CustomException(e, sys)
 
 
-def generateDocuments(row):
+def parseList(value):
+    """CSV columns hold Python list literals such as "['Action', 'Drama']"; lists pass through"""
     try:
-        titles = ", ".join(map(str, row['Title']))
-        genres = ", ".join(map(str, row['Genres']))
-        themes = ", ".join(map(str, row['Themes']))
-        
-        return f"""
-                Id: {row['Id']}
-                Title: {titles}
-                Genre: {genres}
-                Theme: {themes}
-                Episodes: {row['Episodes']},
-                ImageURLS: {row['ImageURLS']}
-""".strip()
+        if isinstance(value, (list, tuple)):
+            return [str(item) for item in value]
+        if not isinstance(value, str) or not value:
+            return []
+        parsed = ast.literal_eval(value)
+        return [str(item) for item in parsed] if isinstance(parsed, (list, tuple)) else [str(parsed)]
+    except (ValueError, SyntaxError):
+        return [value]
+    except Exception as e:
+        raise CustomException(e, sys)
+
+TITLE_SEPARATOR = " | "
+
+def generateEmbeddingText(row, synopsis=None):
+    """Compact text that gets embedded: only the fields a user would search by"""
+    try:
+        known = lambda values: [value for value in parseList(values) if value != "Unknown"]
+        # Aliases often differ only in case ("Steins;Gate" / "STEINS;GATE")
+        titles = []
+        for title in parseList(row['Title']):
+            if title.lower() not in (seen.lower() for seen in titles):
+                titles.append(title)
+        lines = [
+            f"Title: {TITLE_SEPARATOR.join(titles)}",
+            f"Genre: {', '.join(known(row['Genres']))}",
+            f"Theme: {', '.join(known(row['Themes']))}",
+        ]
+        if isinstance(synopsis, str) and synopsis.strip():
+            lines.append(f"Synopsis: {' '.join(str(synopsis).split())}")
+        return "\n".join(lines)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def generateMetadata(row):
+    """Display payload stored in Document.metadata and never embedded"""
+    try:
+        episodes = row['Episodes']
+        return {
+            "Id": int(row['Id']),
+            "ImageURLS": row['ImageURLS'],
+            "Episodes": None if episodes != episodes or episodes in (None, "") else int(float(episodes)),
+            "Demographic": ", ".join(parseList(row['Demographics']))
+        }
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def generateDocuments(row, include_synopsis=False):
+    """(embedding text, metadata) for one anime row"""
+    try:
+        synopsis = row.get('Synopsis') if include_synopsis else None
+        return generateEmbeddingText(row, synopsis=synopsis), generateMetadata(row)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def formatContext(documents):
+    """Context block for the LLM prompt: embedded text plus the display fields it must copy"""
+    try:
+        blocks = []
+        for document in documents:
+            # Documents from an index built before the split already carry
+            # these lines in page_content and have no such metadata keys.
+            lines = [document.page_content]
+            for key in ("Episodes", "Demographic", "ImageURLS"):
+                if key in document.metadata:
+                    lines.append(f"{key}: {document.metadata[key]}")
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def documentId(document):
+    """MAL Id of a retrieved anime document, from metadata or the "Id:" line every index layout has"""
+    try:
+        anime_id = (document.metadata or {}).get("Id")
+        if anime_id is None:
+            for line in document.page_content.splitlines():
+                key, _, value = line.strip().partition(": ")
+                if key == "Id":
+                    anime_id = value.rstrip(",").strip()
+                    break
+        return None if anime_id in (None, "") else str(anime_id)
     except Exception as e:
         raise CustomException(e, sys)
 
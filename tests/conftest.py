@@ -0,0 +1,122 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# supabase_client builds its client on import; it only needs well-formed settings
+os.environ.setdefault("SUPABASE_API_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_API_KEY", "test-key")
+
+from backend.app.services.catalog_service import AnimeCatalog
+from backend.app.services.recommendation_cache_service import HistoryCache, CandidatePoolCache
+
+
+class FakeQuery:
+    def __init__(self, supabase, table):
+        self.supabase = supabase
+        self.table = table
+        self.filters = []
+        self.row = None
+        self.deleting = False
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def insert(self, row):
+        self.row = row
+        return self
+
+    def delete(self):
+        self.deleting = True
+        return self
+
+    def execute(self):
+        rows = self.supabase.tables.setdefault(self.table, [])
+        if self.row is not None:
+            row = {f"{self.table}_row_id": len(rows) + 1, **self.row}
+            if self.table == "animes":
+                row["anime_id"] = len(rows) + 1
+            rows.append(row)
+            return SimpleNamespace(data=[row], count=None)
+        matched = [row for row in rows if all(row.get(column) == value for column, value in self.filters)]
+        if self.deleting:
+            self.supabase.tables[self.table] = [row for row in rows if row not in matched]
+        return SimpleNamespace(data=matched, count=None)
+
+
+class FakeSupabase:
+    """Just enough of supabase.Client for the controllers, backed by in-memory tables"""
+
+    def __init__(self, tables=None, email="user@example.com"):
+        self.tables = tables or {}
+        self.rpc_calls = []
+        user = SimpleNamespace(email=email, id="auth-uuid")
+        self.auth = SimpleNamespace(
+            get_user=lambda jwt: SimpleNamespace(user=user),
+            sign_out=lambda: None,
+            admin=SimpleNamespace(delete_user=lambda user_id: None),
+        )
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        # Runs the user_history function (backend/sql/user_history.sql) over the in-memory tables
+        self.rpc_calls.append(params)
+        names = {row["anime_id"]: row["anime_name"] for row in self.tables.get("animes", [])}
+        interactions = sorted(
+            (row for row in self.tables.get("useranimeinteractions", []) if row["user_id"] == params["p_user_id"]),
+            key=lambda row: -row["useranimeinteractions_row_id"],
+        )
+        rows = [
+            {"interaction_id": row["useranimeinteractions_row_id"], "interaction_type": row["interaction_type"],
+             "anime_name": names.get(row["anime_id"])}
+            for row in interactions
+            if params["p_cursor"] is None or row["useranimeinteractions_row_id"] < params["p_cursor"]
+        ][:params["p_limit"] + 1]
+        anime_counts = None
+        if params["p_with_counts"]:
+            anime_counts = {}
+            for row in interactions:
+                anime_counts[names[row["anime_id"]]] = anime_counts.get(names[row["anime_id"]], 0) + 1
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data={"rows": rows, "anime_counts": anime_counts}))
+
+
+@pytest.fixture
+def catalog():
+    return AnimeCatalog([
+        {"id": "1", "title": "Sousou no Frieren", "titles": ["Sousou no Frieren", "Frieren"],
+         "genres": ["Adventure", "Drama", "Fantasy"], "themes": [], "demographics": ["Shounen"],
+         "episodes": "28.0", "url": "https://example.com/1.jpg"},
+        {"id": "2", "title": "Chainsaw Man", "titles": ["Chainsaw Man"],
+         "genres": ["Action", "Fantasy"], "themes": ["Gore"], "demographics": ["Shounen"],
+         "episodes": "12.0", "url": "https://example.com/2.jpg"},
+        {"id": "3", "title": "Mushishi", "titles": ["Mushishi"],
+         "genres": ["Mystery", "Slice of Life"], "themes": ["Historical"], "demographics": ["Seinen"],
+         "episodes": "26.0", "url": "https://example.com/3.jpg"},
+    ])
+
+
+@pytest.fixture
+def make_request(catalog):
+    """Request stand-in with the app.state the controllers read"""
+
+    def make(token="token", **state):
+        app_state = SimpleNamespace(
+            catalog=catalog,
+            history_cache=HistoryCache(),
+            candidate_cache=CandidatePoolCache(),
+        )
+        for name, value in state.items():
+            setattr(app_state, name, value)
+        return SimpleNamespace(
+            cookies={"access_token": token} if token else {},
+            headers={},
+            app=SimpleNamespace(state=app_state),
+        )
+
+    return make
@@ -0,0 +1,128 @@
+import time
+import itertools
+import threading
+
+import pytest
+
+from backend.app.services.admission_service import AdmissionController, AdmissionRejected
+from backend.app.utils.metrics import metrics
+
+_names = itertools.count()
+
+
+def make_controller(max_concurrency=1, max_queue=8, max_wait_seconds=5.0, max_per_user=8):
+    return AdmissionController(
+        name=f"admission.test{next(_names)}",
+        max_concurrency=max_concurrency,
+        max_queue=max_queue,
+        max_wait_seconds=max_wait_seconds,
+        max_per_user=max_per_user,
+    )
+
+
+def queue_depth(controller):
+    return metrics.snapshot()["gauges"].get(f"{controller.name}.queue_depth", 0)
+
+
+def wait_for_queue_depth(controller, depth, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while queue_depth(controller) != depth:
+        assert time.monotonic() < deadline, f"queue depth never reached {depth}"
+        time.sleep(0.005)
+
+
+def start_waiter(controller, user, admitted=None, release=None):
+    """Queue `user` on a thread; once admitted it records itself and holds its slot until `release` is set"""
+
+    def run():
+        with controller.admit(user):
+            if admitted is not None:
+                admitted.append(user)
+            if release is not None:
+                release.wait(5.0)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_user_limit_counts_running_and_queued_requests():
+    controller = make_controller(max_concurrency=1, max_per_user=2)
+    release = threading.Event()
+    controller.acquire("a")
+    waiter = start_waiter(controller, "a", release=release)
+    wait_for_queue_depth(controller, 1)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("a")
+    assert rejected.value.reason == "user_limit"
+    assert rejected.value.retry_after >= 1
+
+    release.set()
+    controller.release("a", 0.0)
+    waiter.join(2.0)
+
+
+def test_queue_full_rejects_with_retry_after_from_backlog():
+    controller = make_controller(max_concurrency=1, max_queue=1)
+    release = threading.Event()
+    controller.acquire("a")
+    waiter = start_waiter(controller, "b", release=release)
+    wait_for_queue_depth(controller, 1)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("c")
+    assert rejected.value.reason == "queue_full"
+    # 5s default service time, one queued request plus this one, one slot
+    assert rejected.value.retry_after == 10
+
+    release.set()
+    controller.release("a", 0.0)
+    waiter.join(2.0)
+
+
+def test_queue_timeout_leaves_the_queue():
+    controller = make_controller(max_concurrency=1, max_wait_seconds=0.05)
+    controller.acquire("a")
+
+    started = time.monotonic()
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("b")
+    assert rejected.value.reason == "queue_timeout"
+    assert time.monotonic() - started < 1.0
+    assert queue_depth(controller) == 0
+
+    controller.release("a", 0.0)
+    controller.acquire("b")
+    controller.release("b", 0.0)
+
+
+def test_retry_after_follows_observed_service_time():
+    controller = make_controller(max_concurrency=1, max_queue=0)
+    for _ in range(20):
+        controller.acquire("a")
+        controller.release("a", 20.0)
+    controller.acquire("a")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("b")
+    assert rejected.value.reason == "queue_full"
+    assert 19 <= rejected.value.retry_after <= 20
+
+    controller.release("a", 0.0)
+
+
+def test_freed_slots_go_round_robin_over_users():
+    controller = make_controller(max_concurrency=1)
+    admitted = []
+    controller.acquire("x")
+    waiters = []
+    for depth, user in enumerate(["a", "a", "a", "b"], start=1):
+        waiters.append(start_waiter(controller, user, admitted=admitted))
+        wait_for_queue_depth(controller, depth)
+
+    controller.release("x", 0.0)
+    for waiter in waiters:
+        waiter.join(2.0)
+
+    assert admitted == ["a", "b", "a", "a"]
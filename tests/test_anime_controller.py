@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from backend.app.controllers import anime_controller
+
+from conftest import FakeSupabase
+
+
+def test_get_anime_records_view_and_updates_history_cache(monkeypatch, make_request):
+    supabase = FakeSupabase({"users": [{"user_id": 7, "email": "user@example.com"}]})
+    monkeypatch.setattr(anime_controller, "client", supabase)
+    request = make_request()
+    history_cache = request.app.state.history_cache
+    generation = history_cache.history(7)["generation"]
+    history_cache.store_page(7, generation, (None, 20), {"items": [], "next_cursor": None})
+    history_cache.set_genre_counts(7, generation, {"Action": 1})
+
+    payload = SimpleNamespace(title="Sousou no Frieren", genre="Adventure, Drama, Fantasy")
+    assert anime_controller.getAnime(payload, request) == {"message": "Anime viewed successfully"}
+    anime_controller.getAnime(payload, request)
+
+    assert len(supabase.tables["animes"]) == 1
+    interactions = supabase.tables["useranimeinteractions"]
+    assert [(row["user_id"], row["anime_id"]) for row in interactions] == [(7, 1), (7, 1)]
+
+    history = history_cache.history(7)
+    assert history["pages"] == {}
+    assert history["genre_counts"] == {"Adventure": 2, "Drama": 2, "Fantasy": 2, "Action": 1}
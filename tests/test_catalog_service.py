@@ -0,0 +1,37 @@
+from langchain_core.documents import Document
+
+from backend.app.services.recommendation_cache_service import CandidatePoolCache
+
+# The index shipped before the embedding/metadata split joined every list character by character
+LEGACY = Document(page_content="Id: 1\n                Title: [, ', S, o, u, s, o, u, ', ]\n                Genre: [, ', A, ', ]")
+SPLIT = Document(page_content="Title: Chainsaw Man\nGenre: Action, Fantasy", metadata={"Id": 2, "ImageURLS": "ignored"})
+UNKNOWN = Document(page_content="Id: 999\nTitle: Missing")
+
+
+def test_candidates_are_hydrated_from_catalog_in_both_layouts(catalog):
+    candidates = catalog.candidates([LEGACY, SPLIT, UNKNOWN])
+
+    assert [candidate["id"] for candidate in candidates] == ["1", "2"]
+    assert candidates[0] == {
+        "id": "1",
+        "title": "Sousou no Frieren",
+        "titles": ["Sousou no Frieren", "Frieren"],
+        "genre": "Adventure, Drama, Fantasy",
+        "theme": "",
+        "url": "https://example.com/1.jpg",
+    }
+    assert candidates[1]["genre"] == "Action, Fantasy"
+    assert candidates[1]["url"] == "https://example.com/2.jpg"
+
+
+def test_candidate_pool_drops_titles_the_llm_already_picked(catalog):
+    cache = CandidatePoolCache()
+    cache.store(
+        token="token",
+        query="dark fantasy",
+        message="Here you go",
+        recommendations=[{"title": "frieren"}],
+        candidates=catalog.candidates([LEGACY, SPLIT, Document(page_content="Id: 3")]),
+    )
+
+    assert [candidate["title"] for candidate in cache.load("token")["candidates"]] == ["Chainsaw Man", "Mushishi"]
@@ -0,0 +1,218 @@
+import time
+import asyncio
+
+import pytest
+
+from backend.app.services.llm_provider_service import (
+    CircuitBreaker,
+    FakeProvider,
+    HedgedLLM,
+    LatencyTracker,
+    LLMDeadlineExceeded,
+    LLMUnavailable,
+    Provider,
+)
+
+
+def make_provider(name, fake, hedge_after=5.0, breaker=None):
+    # min_samples is never reached in these tests, so the hedge delay is `hedge_after`
+    return Provider(
+        name=name,
+        runnable=fake,
+        breaker=breaker or CircuitBreaker(),
+        latency=LatencyTracker(min_samples=1000, default_seconds=hedge_after),
+    )
+
+
+def make_llm(*providers, deadline_seconds=5.0):
+    return HedgedLLM(list(providers), validate=lambda result: result != "invalid", deadline_seconds=deadline_seconds)
+
+
+def test_fast_primary_is_not_hedged():
+    primary = FakeProvider("a", latency=0.01)
+    secondary = FakeProvider("b")
+    llm = make_llm(make_provider("a", primary, hedge_after=0.2), make_provider("b", secondary))
+
+    assert llm.invoke("query") == "a"
+    assert secondary.calls == 0
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled():
+    primary = FakeProvider("a", latency=2.0)
+    secondary = FakeProvider("b", latency=0.05)
+    llm = make_llm(make_provider("a", primary, hedge_after=0.1), make_provider("b", secondary))
+
+    started = time.monotonic()
+    assert llm.invoke("query") == "b"
+    elapsed = time.monotonic() - started
+
+    assert 0.1 <= elapsed < 1.0
+    assert primary.calls == 1 and primary.cancelled == 1
+    assert secondary.calls == 1 and secondary.cancelled == 0
+
+
+def test_failed_primary_fails_over_without_waiting_for_hedge():
+    primary = FakeProvider("a", failure_rate=1.0)
+    secondary = FakeProvider("b", latency=0.01)
+    llm = make_llm(make_provider("a", primary, hedge_after=5.0), make_provider("b", secondary))
+
+    started = time.monotonic()
+    assert llm.invoke("query") == "b"
+    assert time.monotonic() - started < 1.0
+
+
+def test_invalid_response_fails_over():
+    primary = FakeProvider("invalid")
+    secondary = FakeProvider("b")
+    llm = make_llm(make_provider("a", primary), make_provider("b", secondary))
+
+    assert llm.invoke("query") == "b"
+
+
+def test_all_providers_failing_raises_unavailable():
+    llm = make_llm(
+        make_provider("a", FakeProvider("a", failure_rate=1.0)),
+        make_provider("b", FakeProvider("b", failure_rate=1.0)),
+    )
+
+    with pytest.raises(LLMUnavailable):
+        llm.invoke("query")
+
+
+def test_deadline_cancels_every_in_flight_call():
+    primary = FakeProvider("a", latency=5.0)
+    secondary = FakeProvider("b", latency=5.0)
+    llm = make_llm(
+        make_provider("a", primary, hedge_after=0.05),
+        make_provider("b", secondary),
+        deadline_seconds=0.2,
+    )
+
+    started = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        llm.invoke("query")
+
+    assert time.monotonic() - started < 1.0
+    assert primary.cancelled == 1 and secondary.cancelled == 1
+
+
+def test_breaker_opens_and_skips_provider():
+    breaker = CircuitBreaker(window=10, min_calls=3, error_threshold=0.5, cooldown_seconds=60.0)
+    primary = FakeProvider("a", failure_rate=1.0)
+    secondary = FakeProvider("b")
+    llm = make_llm(make_provider("a", primary, breaker=breaker), make_provider("b", secondary))
+
+    for _ in range(3):
+        assert llm.invoke("query") == "b"
+    assert breaker.is_open
+
+    llm.invoke("query")
+    assert primary.calls == 3
+
+
+def test_breaker_half_open_trial_closes_on_success():
+    breaker = CircuitBreaker(window=10, min_calls=2, error_threshold=0.5, cooldown_seconds=0.1)
+    primary = FakeProvider("a", failure_rate=1.0)
+    secondary = FakeProvider("b")
+    llm = make_llm(make_provider("a", primary, breaker=breaker), make_provider("b", secondary))
+
+    llm.invoke("query")
+    llm.invoke("query")
+    assert breaker.is_open
+
+    time.sleep(0.15)
+    primary.failure_rate = 0.0
+    assert llm.invoke("query") == "a"
+    assert not breaker.is_open
+
+
+def test_cancelled_half_open_trial_is_released():
+    breaker = CircuitBreaker(window=10, min_calls=1, error_threshold=0.5, cooldown_seconds=0.0)
+    breaker.record(False)
+    primary = FakeProvider("a", latency=5.0)
+    llm = make_llm(make_provider("a", primary, hedge_after=0.05, breaker=breaker), deadline_seconds=0.1)
+
+    with pytest.raises(LLMDeadlineExceeded):
+        llm.invoke("query")
+
+    assert primary.cancelled == 1
+    assert breaker.allow()
+
+
+def test_sync_calls_share_one_event_loop():
+    loops = []
+
+    async def response(value):
+        loops.append(asyncio.get_running_loop())
+        return "a"
+
+    class LoopRecordingProvider(FakeProvider):
+        async def ainvoke(self, value, config=None):
+            return await self.response(value)
+
+    llm = make_llm(make_provider("a", LoopRecordingProvider(response)))
+    assert llm.invoke("first") == "a"
+    assert llm.invoke("second") == "a"
+
+    assert len(loops) == 2 and loops[0] is loops[1]
+    assert not loops[0].is_closed()
+
+
+def test_trial_finishing_alongside_winner_is_settled():
+    release = asyncio.Event()
+
+    class GatedProvider(FakeProvider):
+        async def ainvoke(self, value, config=None):
+            self.calls += 1
+            await release.wait()
+            return self.response
+
+    async def open_gate():
+        await asyncio.sleep(0.05)
+        release.set()
+
+    # Both circuits are half-open, so whichever result is not consumed belongs to a trial
+    breakers = [CircuitBreaker(window=10, min_calls=1, error_threshold=0.5, cooldown_seconds=0.0) for _ in range(2)]
+    for breaker in breakers:
+        breaker.record(False)
+    llm = make_llm(
+        make_provider("a", GatedProvider("a"), hedge_after=0.0, breaker=breakers[0]),
+        make_provider("b", GatedProvider("b"), breaker=breakers[1]),
+    )
+
+    async def run():
+        gate = asyncio.ensure_future(open_gate())
+        result = await llm.ainvoke("query")
+        await gate
+        return result
+
+    assert asyncio.run(run()) in ("a", "b")
+    assert not any(breaker.is_open for breaker in breakers)
+    assert all(breaker.allow() for breaker in breakers)
+
+
+def test_trial_cancelled_before_it_starts_is_released():
+    class CountingBreaker(CircuitBreaker):
+        granted = 0
+
+        def allow(self):
+            allowed = super().allow()
+            self.granted += int(allowed)
+            return allowed
+
+    breaker = CountingBreaker(window=10, min_calls=1, error_threshold=0.5, cooldown_seconds=0.0)
+    breaker.record(False)
+    primary = FakeProvider("a", latency=5.0)
+    secondary = FakeProvider("b")
+    # The hedge is due exactly at the deadline, so it is launched and cancelled in the same step
+    llm = make_llm(
+        make_provider("a", primary, hedge_after=0.1),
+        make_provider("b", secondary, breaker=breaker),
+        deadline_seconds=0.1,
+    )
+
+    with pytest.raises(LLMDeadlineExceeded):
+        llm.invoke("query")
+
+    assert breaker.granted == 1 and secondary.calls == 0
+    assert breaker.allow()
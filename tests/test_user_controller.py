@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+from backend.app.controllers import anime_controller, user_controller
+
+from conftest import FakeSupabase
+
+
+def make_supabase():
+    return FakeSupabase({"users": [{"user_id": 7, "email": "user@example.com"}]})
+
+
+def view(request, title):
+    anime_controller.getAnime(SimpleNamespace(title=title, genre=""), request)
+
+
+def test_history_pages_and_genre_counts_are_cached(monkeypatch, make_request):
+    supabase = make_supabase()
+    monkeypatch.setattr(anime_controller, "client", supabase)
+    monkeypatch.setattr(user_controller, "client", supabase)
+    request = make_request()
+    for title in ["Sousou no Frieren", "Chainsaw Man", "Mushishi"]:
+        view(request, title)
+
+    first = user_controller.getHistory(request, limit=2)
+    assert [item["title"] for item in first["items"]] == ["Mushishi", "Chainsaw Man"]
+    assert first["genre_counts"]["Fantasy"] == 2
+    second = user_controller.getHistory(request, cursor=first["next_cursor"], limit=2)
+    assert [item["title"] for item in second["items"]] == ["Sousou no Frieren"]
+    assert second["next_cursor"] is None
+
+    assert user_controller.getHistory(request, limit=2) == first
+    assert [call["p_with_counts"] for call in supabase.rpc_calls] == [True, False]
+
+    view(request, "Chainsaw Man")
+    refreshed = user_controller.getHistory(request, limit=2)
+    assert [item["title"] for item in refreshed["items"]] == ["Chainsaw Man", "Mushishi"]
+    assert refreshed["genre_counts"]["Action"] == 2
+    assert supabase.rpc_calls[-1]["p_with_counts"] is False
+
+
+def test_view_during_history_fetch_is_not_cached_stale(monkeypatch, make_request):
+    supabase = make_supabase()
+    monkeypatch.setattr(anime_controller, "client", supabase)
+    monkeypatch.setattr(user_controller, "client", supabase)
+    request = make_request()
+    view(request, "Sousou no Frieren")
+
+    rpc = supabase.rpc
+
+    def rpc_then_view(name, params):
+        # The history query has already read its rows when another request records a view
+        response = rpc(name, params)
+        view(request, "Chainsaw Man")
+        return response
+
+    monkeypatch.setattr(supabase, "rpc", rpc_then_view)
+    stale = user_controller.getHistory(request, limit=10)
+    assert [item["title"] for item in stale["items"]] == ["Sousou no Frieren"]
+
+    monkeypatch.setattr(supabase, "rpc", rpc)
+    fresh = user_controller.getHistory(request, limit=10)
+    assert [item["title"] for item in fresh["items"]] == ["Chainsaw Man", "Sousou no Frieren"]
+    assert fresh["genre_counts"]["Fantasy"] == 2
+
+
+def test_logout_forgets_session_and_history(monkeypatch, make_request):
+    supabase = make_supabase()
+    monkeypatch.setattr(user_controller, "client", supabase)
+    request = make_request()
+    user_controller.getHistory(request)
+    history_cache = request.app.state.history_cache
+    assert history_cache.user_id("token") == 7
+
+    user_controller.logout(request)
+
+    assert history_cache.user_id("token") is None
+    assert history_cache.histories.get(7) is None
+
+
+def test_delete_user_forgets_session_and_history(monkeypatch, make_request):
+    supabase = make_supabase()
+    monkeypatch.setattr(user_controller, "client", supabase)
+    request = make_request()
+    history_cache = request.app.state.history_cache
+    history_cache.remember_user("other-session", 7)
+    user_controller.getHistory(request)
+
+    user_controller.delete_user(request)
+
+    assert supabase.tables["users"] == []
+    assert history_cache.user_id("token") is None
+    assert history_cache.histories.get(7) is None